@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+from threading import Lock
+
+# Remembers which files have already been converted, so that an incremental conversion
+# only needs to convert new or changed files. Each finished file is immediately appended
+# to a journal in the output folder, so that cancelled or interrupted conversions can resume.
+
+cacheFileName = "conversion_cache.jsonl"
+hashChunkSize = 1 << 20
+
+def hash_file(path):
+    fileHash = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(hashChunkSize), b""):
+            fileHash.update(chunk)
+    return fileHash.hexdigest()
+
+class ConversionCache:
+
+    cachePath = ""
+    journal = None
+
+    def __init__(self, outputPath):
+        self.cachePath = os.path.join(outputPath, cacheFileName)
+        self.entries = {}
+        self.cacheLock = Lock()
+
+    def load(self):
+
+        if not (os.path.exists(self.cachePath)):
+            return
+
+        with open(self.cachePath, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # The last line might be incomplete if the conversion was interrupted
+                self.entries[(entry["type"], entry["file"])] = entry
+
+    def get_source_info(self, path, file):
+
+        # The content hash is only recalculated when the file size or modification time has changed
+        stat = os.stat(path)
+        source = {"size" : stat.st_size, "mtime" : stat.st_mtime_ns, "hash" : None}
+
+        self.cacheLock.acquire()
+        for entryType in ["model", "bounds", "image"]:
+            entry = self.entries.get((entryType, file))
+            if(entry is not None and entry["source"]["size"] == source["size"] and entry["source"]["mtime"] == source["mtime"]):
+                source["hash"] = entry["source"]["hash"]
+                break
+        self.cacheLock.release()
+
+        if(source["hash"] is None):
+            source["hash"] = hash_file(path)
+
+        return source
+
+    def get_entry(self, entryType, file, source, settingsKey):
+
+        # Returns the cached entry if the source file and the relevant settings are unchanged, otherwise None
+        self.cacheLock.acquire()
+        entry = self.entries.get((entryType, file))
+        self.cacheLock.release()
+
+        if(entry is None or entry["source"]["hash"] != source["hash"] or entry["settings"] != settingsKey):
+            return None
+
+        return entry
+
+    def add_entry(self, entry):
+
+        self.cacheLock.acquire()
+        self.entries[(entry["type"], entry["file"])] = entry
+
+        if(self.journal is None):
+            self.journal = open(self.cachePath, 'a')
+        self.journal.write(json.dumps(entry) + "\n")
+        self.journal.flush()
+        self.cacheLock.release()
+
+    def update_entry(self, entryType, file, values):
+
+        self.cacheLock.acquire()
+        entry = self.entries.get((entryType, file))
+        self.cacheLock.release()
+
+        if(entry is not None):
+            entry = dict(entry)
+            entry.update(values)
+            self.add_entry(entry)
+
+    def close(self):
+
+        # Rewrite the journal so that it only contains the latest entry of each file
+        self.cacheLock.acquire()
+
+        if(self.journal is not None):
+            self.journal.close()
+            self.journal = None
+
+        if(len(self.entries) > 0):
+            tempPath = self.cachePath + ".tmp"
+            with open(tempPath, 'w') as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tempPath, self.cachePath)
+
+        self.cacheLock.release()
@@ -0,0 +1,156 @@
+import zlib
+import threading
+import numpy as np
+from multiprocessing.pool import ThreadPool
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.block
+except ImportError:
+    lz4 = None
+
+# Optional lossless compression of the frame bodies. The .ply header stays uncompressed,
+# the body behind it is split into chunks of a fixed size, which are compressed independently:
+#   uncompressedSize    uint64, the size of the original body
+#   chunkCount          uint32
+#   chunkSize           uint32, the uncompressed size of all chunks except the last one
+#   compressedSizes     chunkCount x uint32
+#   chunks              the compressed chunks, one after the other
+# All values are little endian. As the position of every chunk is known from the table,
+# readers can decompress the chunks in parallel. Chunks that don't get smaller by compressing them
+# are stored uncompressed, which readers detect by the compressed size matching the uncompressed size.
+
+defaultChunkSize = 1 << 18
+chunkTableDtype = np.dtype([("uncompressedSize", "<u8"), ("chunkCount", "<u4"), ("chunkSize", "<u4")])
+
+class FrameCodec:
+
+    name = ""
+
+    def compress(self, data):
+        return bytes(data)
+
+    def decompress(self, data, uncompressedSize):
+        return bytes(data)
+
+class ZlibCodec(FrameCodec):
+
+    name = "zlib"
+    level = 6
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data, uncompressedSize):
+        return zlib.decompress(data, bufsize=uncompressedSize)
+
+class ZstdCodec(FrameCodec):
+
+    name = "zstd"
+    level = 3
+
+    def __init__(self):
+        # The zstandard contexts are not thread safe, so each thread gets its own
+        self.contexts = threading.local()
+
+    def compress(self, data):
+        if not hasattr(self.contexts, "compressor"):
+            self.contexts.compressor = zstandard.ZstdCompressor(level=self.level)
+        return self.contexts.compressor.compress(data)
+
+    def decompress(self, data, uncompressedSize):
+        if not hasattr(self.contexts, "decompressor"):
+            self.contexts.decompressor = zstandard.ZstdDecompressor()
+        return self.contexts.decompressor.decompress(data, max_output_size=uncompressedSize)
+
+class Lz4Codec(FrameCodec):
+
+    name = "lz4"
+
+    def compress(self, data):
+        return lz4.block.compress(data, store_size=False)
+
+    def decompress(self, data, uncompressedSize):
+        return lz4.block.decompress(data, uncompressed_size=uncompressedSize)
+
+frameCodecs = {"zlib" : ZlibCodec, "zstd" : ZstdCodec, "lz4" : Lz4Codec}
+
+def is_codec_available(name):
+    if(name == "zstd"):
+        return zstandard is not None
+    if(name == "lz4"):
+        return lz4 is not None
+    return name in frameCodecs
+
+def create_codec(name):
+    # Returns None if the codec is unknown or its package is not installed
+    if not (is_codec_available(name)):
+        return None
+    return frameCodecs[name]()
+
+def compress_frame(buffers, codec, chunkSize = defaultChunkSize):
+
+    # Compresses the frame body, given as a list of buffers. Returns the chunk table and the chunks as a list of buffers
+    body = memoryview(b"".join(buffers))
+    chunkCount = (len(body) + chunkSize - 1) // chunkSize
+
+    chunks = []
+    for i in range(chunkCount):
+        chunk = body[i * chunkSize:(i + 1) * chunkSize]
+        compressedChunk = codec.compress(chunk)
+        chunks.append(compressedChunk if len(compressedChunk) < len(chunk) else chunk)
+
+    table = np.zeros(1, dtype=chunkTableDtype)
+    table["uncompressedSize"] = len(body)
+    table["chunkCount"] = chunkCount
+    table["chunkSize"] = chunkSize
+    compressedSizes = np.array([len(chunk) for chunk in chunks], dtype="<u4")
+
+    return [table.view(np.uint8), compressedSizes.view(np.uint8)] + chunks
+
+def read_chunk_table(data):
+
+    # Returns the uncompressed body size, the chunk size and the (offset, compressed size, uncompressed size) of every chunk
+    table = np.frombuffer(data, dtype=chunkTableDtype, count=1)[0]
+    uncompressedSize = int(table["uncompressedSize"])
+    chunkCount = int(table["chunkCount"])
+    chunkSize = int(table["chunkSize"])
+
+    compressedSizes = np.frombuffer(data, dtype="<u4", count=chunkCount, offset=chunkTableDtype.itemsize).astype(np.int64)
+    tableSize = chunkTableDtype.itemsize + chunkCount * 4
+    offsets = tableSize + np.concatenate([[0], np.cumsum(compressedSizes)[:-1]]).astype(np.int64)
+    uncompressedSizes = [min(chunkSize, uncompressedSize - i * chunkSize) for i in range(chunkCount)]
+
+    return uncompressedSize, chunkSize, list(zip(offsets.tolist(), compressedSizes.tolist(), uncompressedSizes))
+
+def decompress_frame(data, codec, threads = 1):
+
+    # Reference decoder for a compressed frame body (the data behind the .ply header).
+    # With more than one thread, the chunks are decompressed in parallel
+    data = memoryview(data)
+    uncompressedSize, chunkSize, chunks = read_chunk_table(data)
+    body = bytearray(uncompressedSize)
+
+    def decompress_chunk(index):
+        offset, compressedSize, chunkUncompressedSize = chunks[index]
+        chunk = data[offset:offset + compressedSize]
+        if(compressedSize != chunkUncompressedSize):
+            chunk = codec.decompress(chunk, chunkUncompressedSize)
+        if(len(chunk) != chunkUncompressedSize):
+            raise ValueError("Corrupted chunk: " + str(index))
+        body[index * chunkSize:index * chunkSize + chunkUncompressedSize] = chunk
+
+    if(threads > 1 and len(chunks) > 1):
+        pool = ThreadPool(processes = min(threads, len(chunks)))
+        pool.map(decompress_chunk, range(len(chunks)))
+        pool.close()
+        pool.join()
+    else:
+        for i in range(len(chunks)):
+            decompress_chunk(i)
+
+    return body
@@ -0,0 +1,150 @@
+import os
+import shutil
+import numpy as np
+
+# A single file containing a whole sequence, as an alternative to one file per frame.
+#
+# Layout (all values little endian):
+#   Header          containerHeaderDtype, 64 bytes
+#   Frame table     frameCount x frameEntryDtype
+#   Texture table   textureCount x textureEntryDtype
+#   Metadata        The content of sequence.json
+#   Payloads        The unchanged .ply/.dds/.astc files, each starting at a multiple of the alignment
+#
+# A player can memory map the file and find any frame directly through the tables.
+# Unused texture formats have an offset and length of 0.
+
+containerFileName = "sequence.gsqc"
+containerMagic = b"GSQC"
+containerVersion = 1
+containerAlignment = 4096 # Page aligned, so that frames can be mapped individually
+
+containerHeaderDtype = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u4"),
+    ("alignment", "<u4"),
+    ("frameCount", "<u4"),
+    ("textureCount", "<u4"),
+    ("reserved", "<u4"),
+    ("frameTableOffset", "<u8"),
+    ("textureTableOffset", "<u8"),
+    ("metadataOffset", "<u8"),
+    ("metadataLength", "<u8"),
+    ("fileSize", "<u8"),
+])
+
+frameEntryDtype = np.dtype([
+    ("offset", "<u8"),
+    ("length", "<u8"),
+    ("headerSize", "<u4"), # The size of the .ply header at the start of the frame
+    ("vertexCount", "<u4"),
+    ("indiceCount", "<u4"),
+    ("reserved", "<u4"),
+])
+
+textureEntryDtype = np.dtype([
+    ("ddsOffset", "<u8"),
+    ("ddsLength", "<u8"),
+    ("astcOffset", "<u8"),
+    ("astcLength", "<u8"),
+])
+
+def align(offset, alignment):
+    return (offset + alignment - 1) // alignment * alignment
+
+def write_container(outputfile, framePaths, headerSizes, verticeCounts, indiceCounts, ddsPaths, astcPaths, metaData, alignment = containerAlignment):
+
+    # ddsPaths/astcPaths contain one path per texture, or are empty if the format is not used.
+    # metaData are the encoded bytes of the sequence.json. The container is first written to a temporary
+    # file, so that an interrupted conversion never leaves a broken container behind
+    textureCount = max(len(ddsPaths), len(astcPaths))
+
+    header = np.zeros(1, dtype=containerHeaderDtype)
+    frames = np.zeros(len(framePaths), dtype=frameEntryDtype)
+    textures = np.zeros(textureCount, dtype=textureEntryDtype)
+
+    header["magic"] = containerMagic
+    header["version"] = containerVersion
+    header["alignment"] = alignment
+    header["frameCount"] = len(framePaths)
+    header["textureCount"] = textureCount
+    header["frameTableOffset"] = containerHeaderDtype.itemsize
+    header["textureTableOffset"] = header["frameTableOffset"] + frames.nbytes
+    header["metadataOffset"] = header["textureTableOffset"] + textures.nbytes
+    header["metadataLength"] = len(metaData)
+
+    # Place all payloads behind each other, the order matches the tables
+    payloads = []
+    offset = int(header["metadataOffset"][0]) + len(metaData)
+
+    def add_payload(path):
+        nonlocal offset
+        offset = align(offset, alignment)
+        length = os.path.getsize(path)
+        payloads.append((path, offset))
+        payloadOffset = offset
+        offset += length
+        return payloadOffset, length
+
+    for i, path in enumerate(framePaths):
+        frames["offset"][i], frames["length"][i] = add_payload(path)
+    frames["headerSize"] = headerSizes
+    frames["vertexCount"] = verticeCounts
+    frames["indiceCount"] = indiceCounts
+
+    for i in range(textureCount):
+        if(i < len(ddsPaths)):
+            textures["ddsOffset"][i], textures["ddsLength"][i] = add_payload(ddsPaths[i])
+        if(i < len(astcPaths)):
+            textures["astcOffset"][i], textures["astcLength"][i] = add_payload(astcPaths[i])
+
+    header["fileSize"] = offset
+
+    tempfile = outputfile + ".tmp"
+    with open(tempfile, 'wb') as f:
+        f.write(header.view(np.uint8))
+        f.write(frames.view(np.uint8))
+        f.write(textures.view(np.uint8))
+        f.write(metaData)
+
+        for path, payloadOffset in payloads:
+            f.write(bytes(payloadOffset - f.tell()))
+            with open(path, 'rb') as payload:
+                shutil.copyfileobj(payload, f, 1 << 20)
+
+    os.replace(tempfile, outputfile)
+
+class SequenceContainer:
+
+    # Reference reader for the container format. Frames and textures are returned as
+    # views into the mapped file, so nothing is copied until the data is actually used
+    header = None
+    frames = None
+    textures = None
+
+    def __init__(self, path):
+        self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        self.header = self.data[:containerHeaderDtype.itemsize].view(containerHeaderDtype)[0]
+
+        if(self.header["magic"] != containerMagic or self.header["version"] != containerVersion):
+            raise ValueError("Not a sequence container: " + path)
+
+        frameTableOffset = int(self.header["frameTableOffset"])
+        textureTableOffset = int(self.header["textureTableOffset"])
+        self.frames = self.data[frameTableOffset:frameTableOffset + int(self.header["frameCount"]) * frameEntryDtype.itemsize].view(frameEntryDtype)
+        self.textures = self.data[textureTableOffset:textureTableOffset + int(self.header["textureCount"]) * textureEntryDtype.itemsize].view(textureEntryDtype)
+
+    def get_metadata(self):
+        offset = int(self.header["metadataOffset"])
+        return self.data[offset:offset + int(self.header["metadataLength"])].tobytes()
+
+    def get_frame(self, index):
+        # The complete .ply file of the frame, the vertex data starts at frames[index]["headerSize"]
+        entry = self.frames[index]
+        return self.data[int(entry["offset"]):int(entry["offset"]) + int(entry["length"])]
+
+    def get_texture(self, index, textureFormat):
+        # textureFormat is either "dds" or "astc"
+        entry = self.textures[index]
+        offset = int(entry[textureFormat + "Offset"])
+        return self.data[offset:offset + int(entry[textureFormat + "Length"])]
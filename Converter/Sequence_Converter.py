@@ -1,13 +1,27 @@
 import os
 import sys
-import subprocess
+import time
 import pymeshlab as ml
 import numpy as np
 import math
-from threading import Lock
+import hashlib
+import multiprocessing
+from threading import Lock, Thread
 from multiprocessing.pool import ThreadPool
 import Sequence_Metadata
-from PIL import Image
+import Sequence_Model_Reader
+import Sequence_Cache
+import Sequence_Texture_Encoder
+import Sequence_Pipeline
+import Sequence_Container
+import Sequence_Quantization
+import Sequence_Compression
+import Sequence_Ordering
+import Sequence_Texture_Array
+import Sequence_Image_Probe
+import Sequence_Memory_Budget
+import Sequence_Instrumentation
+import json
 
 class SequenceConverterSettings:
     modelPaths = []
@@ -25,17 +39,120 @@ class SequenceConverterSettings:
     convertToDDS = False
     convertToASTC = False
     convertToSRGB = False
+    ddsEncoder = "auto" # "auto" or one of Sequence_Texture_Encoder.ddsEncoders
+    astcEncoder = "auto" # "auto" or one of Sequence_Texture_Encoder.astcEncoders
+    textureBatchSize = 32 # Maximum amount of images sent to an encoder at once
+    writeTextureArrays = False # Pack the per-frame textures into one texture array file per format
+    textureLevels = 1 # Resolutions of each texture, every level halves the size of the previous one. Levels after the first are written into mip<n> subfolders
 
     decimatePointcloud = False
     decimatePercentage = 0
+    decimationMode = "random" # One of Sequence_Ordering.decimationModes
+    sortPoints = False # Store the points of pointclouds in Morton order
+    pointcloudLODs = [] # Percentages of the points in each level of detail after the first, which always contains all points
     saveNormals = False
     generateNormals = False
     invertNormals = False
     useCompression = False
+    positionEncoding = "half" # How compressed positions are stored, one of Sequence_Quantization.positionEncodings
+    positionBits = 16 # Bit depth of the unorm/snorm position encodings
+    normalEncoding = "float" # How normals are stored, one of Sequence_Quantization.normalEncodings
+    frameCompression = "" # Codec for the lossless compression of the frame bodies, one of Sequence_Compression.frameCodecs. Empty to disable
+    frameChunkSize = Sequence_Compression.defaultChunkSize
+    temporalDeltas = False # Store the frames of constant topology meshes as deltas to a keyframe
+    keyframeInterval = 30
+    optimizeMeshes = False # Reorder the faces and vertices of meshes for the vertex cache and vertex fetch
+    meshLODs = [] # Face percentages of the simplified levels of detail of meshes, which are written into lod<n> subfolders
     mergePoints = False
     mergeDistance = 0
 
     maxThreads = 8
+    useProcessPool = False
+    readerThreads = 2 # Threads prefetching the model files from disk
+    pipelineQueueSize = 4 # Maximum amount of models waiting between two conversion stages
+    memoryBudget = 0 # Maximum estimated memory of the models converted at the same time in bytes, 0 for no limit
+    useModelReader = True
+    incrementalConversion = False
+    writeContainer = False # Pack all frames into a single container file
+    containerTextures = False # Also pack the textures into the container
+    writeFrameData = False # Write the per-frame arrays into a binary sidecar instead of the sequence.json
+    traceFile = "" # Optional JSON lines file, into which the statistics of every frame and pass are written, see Sequence_Instrumentation
+
+#The layout of a face in the exported .ply files: One uchar with the indice count, followed by three uint indices
+faceDtype = np.dtype([("count", np.uint8), ("indices", "<u4", (3,))])
+
+class ImageJob:
+    # A single image inside of a texture encoding batch
+    listIndex = 0
+    file = ""
+    inputfile = ""
+    outputfileDDS = ""
+    outputfileASTC = ""
+    dimensions = None
+    encode = True
+    cacheEntry = None
+    stageTimes = None
+
+class ModelJob:
+    # A single model while it moves through the read, process and write stages
+    listIndex = 0
+    file = ""
+    inputfile = ""
+    outputfile = ""
+    fileData = None
+    packedData = None
+    lodPackedData = [] # The packed data of each simplified level of detail
+    result = None
+    done = False # Set once the result is final (cached, failed or cancelled), the following stages skip the job
+    reservedMemory = 0 # The part of the memory budget held by this job
+
+class ModelResult:
+    # The outcome of loading/converting a single model. Workers only return
+    # these, the metadata is updated in the main process with apply_*_result()
+    listIndex = 0
+    finished = False
+    error = False
+    errorText = ""
+    vertexCount = 0
+    indiceCount = 0
+    headerSize = 0
+    geometryType = Sequence_Metadata.GeometryType.point
+    hasUVs = False
+    hasNormals = False
+    boundsMin = None
+    boundsMax = None
+    cacheEntry = None
+    averageNormal = None
+    normalSign = 1 # -1 if the normals in the written file have already been flipped
+    topologyHash = None # Only set for meshes, identical for frames with the same vertex count and faces
+    lodVertexCounts = [] # Only for meshes with levels of detail, for every level after the first
+    lodIndiceCounts = []
+    lodHeaderSizes = []
+    cached = False
+    stageTimes = None # Seconds spent in each stage, see Sequence_Instrumentation
+    bytesRead = 0
+    bytesWritten = 0
+
+# Each worker process of the process pool owns its own converter and thereby its own pymeshlab instance
+workerConverter = None
+
+def init_model_worker(convertSettings, terminateEvent, meshOrder):
+    global workerConverter
+    workerConverter = SequenceConverter()
+    workerConverter.convertSettings = convertSettings
+    workerConverter.meshOrder = meshOrder
+    workerConverter.terminateEvent = terminateEvent
+    if(convertSettings.incrementalConversion):
+        workerConverter.conversionCache = Sequence_Cache.ConversionCache(convertSettings.outputPath)
+        workerConverter.conversionCache.load()
+
+def get_model_bounds_in_worker(listIndex, file):
+    workerConverter.terminateProcessing = workerConverter.terminateEvent.is_set()
+    return workerConverter.get_model_bounds(listIndex, file)
+
+def process_model_in_worker(listIndex, file):
+    workerConverter.terminateProcessing = workerConverter.terminateEvent.is_set()
+    return workerConverter.process_model(listIndex, file)
 
 class SequenceConverter:
 
@@ -43,17 +160,39 @@ class SequenceConverter:
     terminateProcessing = False
     debugMode = False
 
+    preprocessPool = None
     modelPool = None
+    modelPipeline = None
+    modelFeeder = None
+    memoryBudget = None
+    poolPendingCount = 0 # Models put into the process pool which haven't finished yet
     texturePool = None
+    pipelineCounters = {} # Counters of the last model pipeline, kept after it has been released
 
     processFinishedCB = None
+    terminateEvent = None
+    conversionCache = None
+    ddsEncoder = None
+    astcEncoder = None
+    frameCodec = None
+    imageInfos = []
+    conversionStats = None
+    preprocessStartTime = None
+    textureThreads = 1
 
     loadMeshLock = Lock()
+    poolPendingLock = Lock()
     activeThreads = 0
 
     #Only used for pointcloud normal estimation
-    lastAverageNormal = [0, 0, 0]
-    firstEstimation = True
+    averageNormals = []
+    normalSigns = []
+
+    #Only used for the temporal delta encoding
+    topologyHashes = []
+
+    #The mesh order of the first frame, which is reused by all frames with the same topology
+    meshOrder = None
 
     def lockLoadMeshLock(self):
         if not self.debugMode:
@@ -62,17 +201,54 @@ class SequenceConverter:
         if not self.debugMode:
             self.loadMeshLock.release()
 
-    def set_conversion_settings(self, convertSettings, processFinishedCB):
+    def set_conversion_settings(self, convertSettings, processFinishedCB, statsCB = None):
+        # statsCB(record) is optional and receives the statistics of every converted frame and pass, see Sequence_Instrumentation
         self.convertSettings = convertSettings
         self.terminateProcessing = False
         self.processFinishedCB = processFinishedCB
+        self.conversionStats = Sequence_Instrumentation.ConversionStats(convertSettings.traceFile, statsCB)
+
+        # The converter can be reused for multiple conversions, so nothing may be left over from the previous one
+        self.modelPool = None
+        self.modelPipeline = None
+        self.modelFeeder = None
+        self.memoryBudget = None
+        self.poolPendingCount = 0
+        self.texturePool = None
+        self.pipelineCounters = {}
+        self.ddsEncoder = None
+        self.astcEncoder = None
+        self.frameCodec = None
+
+        # pymeshlab changes the working directory while it loads some formats (e.g. .obj). As the read and write
+        # stages of the pipeline run at the same time, all paths need to be absolute to not depend on the working directory.
+        # The model and image paths are file names inside of the input folder, so all frame paths derived from them are absolute as well
+        self.convertSettings.inputPath = os.path.abspath(self.convertSettings.inputPath)
+        self.convertSettings.outputPath = os.path.abspath(self.convertSettings.outputPath)
+
         self.debugMode = hasattr(sys, 'gettrace') and sys.gettrace() is not None
 
+        # The textures use the requested amount of threads, even if there are less (or no) models than threads
+        self.textureThreads = max(1, self.convertSettings.maxThreads)
+
         # Limit the threads if there are less models than threads or single-threading is needed
         if(len(self.convertSettings.modelPaths) < self.convertSettings.maxThreads):
             self.convertSettings.maxThreads = len(self.convertSettings.modelPaths)
-        elif self.convertSettings.generateNormals:
-            self.convertSettings.maxThreads = 1
+
+        # The process pool only pays off when there are actually multiple workers
+        if(self.convertSettings.maxThreads < 2):
+            self.convertSettings.useProcessPool = False
+
+        if(self.convertSettings.useProcessPool):
+            self.terminateEvent = multiprocessing.Event()
+        else:
+            self.terminateEvent = None
+
+        if(self.convertSettings.incrementalConversion):
+            self.conversionCache = Sequence_Cache.ConversionCache(self.convertSettings.outputPath)
+            self.conversionCache.load()
+        else:
+            self.conversionCache = None
 
     def start_preprocessing(self):
 
@@ -82,24 +258,62 @@ class SequenceConverter:
         # For the compression, we need to find out the min and max bounds of the
         # sequence first. So we first load all models once to get the bounds.
         # This prepass is pretty slow, so we only do it if needed
+        # Each task carries the index of its frame, so that the results land in the correct metadata slot
+        tasks = list(enumerate(self.convertSettings.modelPaths))
+        self.preprocessStartTime = time.perf_counter()
+
         if self.debugMode:
-            for model in self.convertSettings.modelPaths:
-                self.calculate_min_max_bounds(model)
+            for task in tasks:
+                self.calculate_min_max_bounds(*task)
+        elif self.convertSettings.useProcessPool:
+            self.preprocessPool = self.create_process_pool()
+            for task in tasks:
+                self.preprocessPool.apply_async(get_model_bounds_in_worker, task, callback=self.apply_bounds_result, error_callback=self.worker_failed)
         else:
-            get_bounds_pool = ThreadPool(processes = self.convertSettings.maxThreads)
-            get_bounds_pool.map_async(self.calculate_min_max_bounds, self.convertSettings.modelPaths)
+            self.preprocessPool = ThreadPool(processes = self.convertSettings.maxThreads)
+            self.preprocessPool.starmap_async(self.calculate_min_max_bounds, tasks)
 
         return True
 
+    def finish_preprocessing(self):
+        # Blocks until all bounds have been calculated. Only needed when the
+        # conversion is not driven by the processFinishedCB progress count
+        if(self.preprocessPool is not None):
+            self.preprocessPool.close()
+            self.preprocessPool.join()
+            self.preprocessPool = None
+
+        if(self.preprocessStartTime is not None):
+            self.add_pass_stats("bounds", self.preprocessStartTime)
+            self.preprocessStartTime = None
+
     def start_conversion(self):
 
         if(self.convertSettings is None):
             return False
-        
+
+        # Preprocessing has finished at this point, so this only releases its workers
+        self.finish_preprocessing()
+
+        if(self.uses_octahedral_normals()):
+            self.convertSettings.metaData.set_metadata_normal_encoding(self.convertSettings.normalEncoding)
+
+        if(self.uses_frame_compression()):
+            self.convertSettings.metaData.set_metadata_frame_compression(self.convertSettings.frameCompression, self.convertSettings.frameChunkSize)
+
+        if(self.uses_quantized_positions()):
+            boundsCenter, boundsSize = self.convertSettings.metaData.get_metadata_bounds()
+            self.convertSettings.metaData.set_metadata_position_encoding(self.convertSettings.positionEncoding,
+                Sequence_Quantization.get_position_bits(self.convertSettings.positionEncoding, self.convertSettings.positionBits),
+                *Sequence_Quantization.get_position_dequantization(self.convertSettings.positionEncoding, self.convertSettings.positionBits, boundsCenter, boundsSize))
+
         modelCount = len(self.convertSettings.modelPaths)
         self.convertSettings.metaData.headerSizes = [None] * modelCount
         self.convertSettings.metaData.verticeCounts = [None] * modelCount
         self.convertSettings.metaData.indiceCounts = [None] * modelCount
+        self.convertSettings.metaData.lodVerticeCounts = [None] * modelCount
+        self.convertSettings.metaData.lodIndiceCounts = [None] * modelCount
+        self.convertSettings.metaData.lodHeaderSizes = [None] * modelCount
 
         if(len(self.convertSettings.modelPaths) > 0):
             self.process_models()
@@ -110,8 +324,24 @@ class SequenceConverter:
 
     def terminate_conversion(self):
         self.terminateProcessing = True
+        if(self.terminateEvent is not None):
+            self.terminateEvent.set()
+
+    def create_process_pool(self):
+        # The settings are only transferred once per worker, not once per file
+        return multiprocessing.Pool(processes = self.convertSettings.maxThreads, initializer = init_model_worker, initargs = (self.convertSettings, self.terminateEvent, self.meshOrder))
+
+    def worker_failed(self, exception):
+        self.processFinishedCB(True, "Error in conversion process: " + str(exception))
 
     def finish_conversion(self, writeMetaData):
+        if(self.modelPipeline is not None):
+            self.modelPipeline.join()
+
+        # All models need to be in the pool before it can be closed
+        if(self.modelFeeder is not None):
+            self.modelFeeder.join()
+
         if(self.modelPool is not None):
             waitOnClose = True
             while(waitOnClose):
@@ -122,6 +352,14 @@ class SequenceConverter:
                     waitOnClose = True
             self.modelPool.join()
 
+        if(self.modelPipeline is not None):
+            self.pipelineCounters = self.modelPipeline.get_counters()
+
+        self.modelPool = None
+        self.modelPipeline = None
+        self.modelFeeder = None
+        self.memoryBudget = None
+
         if(self.texturePool is not None):
             waitOnClose = True
             while(waitOnClose):
@@ -130,129 +368,661 @@ class SequenceConverter:
                     self.texturePool.close()
                 except:
                     waitOnClose = True
-            self.texturePool.close()
+            self.texturePool.join()
+            self.texturePool = None
+
+        if(writeMetaData and self.convertSettings.generateNormals and self.convertSettings.isPointcloud):
+            passStartTime = time.perf_counter()
+            self.orient_pointcloud_normals()
+            self.add_pass_stats("orientNormals", passStartTime)
+
+        if(writeMetaData and self.convertSettings.temporalDeltas):
+            passStartTime = time.perf_counter()
+            self.encode_temporal_deltas()
+            self.add_pass_stats("temporalDeltas", passStartTime)
+
+        if(writeMetaData and self.convertSettings.writeTextureArrays):
+            passStartTime = time.perf_counter()
+            self.write_texture_arrays()
+            self.add_pass_stats("textureArrays", passStartTime)
+
+        if(self.conversionCache is not None):
+            self.conversionCache.close()
+
+        if(writeMetaData and self.convertSettings.writeContainer):
+            self.convertSettings.metaData.containerFile = Sequence_Container.containerFileName
+
+        if(writeMetaData and self.convertSettings.writeFrameData):
+            self.convertSettings.metaData.frameDataFile = Sequence_Metadata.frameDataFileName
 
         if(writeMetaData):
+            passStartTime = time.perf_counter()
             self.write_metadata()
+            self.add_pass_stats("metadata", passStartTime)
+
+        if(writeMetaData and self.convertSettings.writeContainer):
+            passStartTime = time.perf_counter()
+            self.write_container()
+            self.add_pass_stats("container", passStartTime)
+
+        if(self.conversionStats is not None):
+            self.conversionStats.close()
+
+    def add_pass_stats(self, name, startTime):
+        if(self.conversionStats is not None):
+            self.conversionStats.add_pass(name, startTime)
+
+    def get_conversion_summary(self):
+        # The totals of all frames and passes converted so far, see Sequence_Instrumentation.ConversionStats.get_summary
+        if(self.conversionStats is None):
+            return {}
+        return self.conversionStats.get_summary()
 
     def write_metadata(self):
         self.convertSettings.metaData.write_metaData(self.convertSettings.outputPath)
 
+    def write_container(self):
+
+        # Packs all converted files into one container, once all frames are final
+        metaData = self.convertSettings.metaData
+        framePaths = [self.get_model_output_path(file) for file in self.convertSettings.modelPaths]
+        ddsPaths = []
+        astcPaths = []
+
+        if(self.convertSettings.containerTextures):
+            for file in self.convertSettings.imagePaths:
+                outputfileDDS, outputfileASTC = self.get_image_output_paths(file)
+                if(self.convertSettings.convertToDDS):
+                    ddsPaths.append(outputfileDDS)
+                if(self.convertSettings.convertToASTC):
+                    astcPaths.append(outputfileASTC)
+
+        with open(os.path.join(self.convertSettings.outputPath, "sequence.json"), 'rb') as f:
+            metaDataContent = f.read()
+
+        try:
+            Sequence_Container.write_container(os.path.join(self.convertSettings.outputPath, Sequence_Container.containerFileName),
+                                               framePaths, metaData.headerSizes, metaData.verticeCounts, metaData.indiceCounts, ddsPaths, astcPaths, metaDataContent)
+        except OSError as e:
+            self.processFinishedCB(True, "Error writing the sequence container: " + str(e))
+            return
+
+        # The single files are not needed anymore, except as a cache for the next incremental conversion
+        if not (self.convertSettings.incrementalConversion):
+            for path in framePaths + ddsPaths + astcPaths:
+                os.remove(path)
+
+    def write_texture_arrays(self):
+
+        # Only sequences with a texture per frame are packed
+        imagePaths = self.convertSettings.imagePaths
+        if(len(imagePaths) < 2):
+            return
+
+        textureFormats = []
+        if(self.convertSettings.convertToDDS):
+            textureFormats.append("dds")
+        if(self.convertSettings.convertToASTC):
+            textureFormats.append("astc")
+
+        # Each resolution level gets its own texture array, inside of the folder of the level
+        texturePaths = []
+        for level in range(self.convertSettings.textureLevels):
+            for textureFormat in textureFormats:
+                paths = [self.get_texture_level_paths(file, level)[0 if textureFormat == "dds" else 1] for file in imagePaths]
+                fileName = Sequence_Texture_Array.textureArrayFileNames[textureFormat]
+                if(level > 0):
+                    fileName = self.get_texture_level_folder(level) + "/" + fileName
+
+                try:
+                    offset, stride = Sequence_Texture_Array.write_texture_array(os.path.join(self.convertSettings.outputPath, fileName), paths, textureFormat)
+                except (OSError, ValueError) as e:
+                    self.processFinishedCB(True, "Error writing the texture array: " + str(e))
+                    return
+
+                self.convertSettings.metaData.set_metadata_texture_array(textureFormat, fileName, offset, stride, level)
+                texturePaths += paths
+
+        # The single textures are still needed for the container or as a cache for the next incremental conversion
+        if not (self.convertSettings.incrementalConversion or self.convertSettings.containerTextures):
+            for path in texturePaths:
+                os.remove(path)
+
     def process_models(self):        
 
+        self.averageNormals = [None] * len(self.convertSettings.modelPaths)
+        self.normalSigns = [1] * len(self.convertSettings.modelPaths)
+        self.topologyHashes = [None] * len(self.convertSettings.modelPaths)
+        self.meshOrder = None
+        tasks = list(enumerate(self.convertSettings.modelPaths))
+
         if self.debugMode:
-            self.firstEstimation = True
-            for model in self.convertSettings.modelPaths:
-                self.convert_model(model)
+            for task in tasks:
+                self.convert_model(*task)
         else:
             # Process the first model to establish sequence attributes (Pointcloud or Mesh, has UVs? Normals?)
-            self.convert_model(self.convertSettings.modelPaths[0])
-            self.modelPool = ThreadPool(processes = self.convertSettings.maxThreads)
-            self.modelPool.map_async(self.convert_model, self.convertSettings.modelPaths)
+            self.convert_model(*tasks[0])
 
-    def calculate_min_max_bounds(self, file):
+            if(self.convertSettings.memoryBudget > 0):
+                self.memoryBudget = Sequence_Memory_Budget.MemoryBudget(self.convertSettings.memoryBudget)
 
-        if(self.terminateProcessing):
-            self.processFinishedCB(False, "")
-            return
+            if self.convertSettings.useProcessPool:
+                self.modelPool = self.create_process_pool()
+                if(self.memoryBudget is not None):
+                    # Waiting on the budget would block the caller, so the models are put into the pool from a separate thread
+                    self.modelFeeder = Thread(target=self.feed_model_pool, args=(tasks[1:],), daemon=True)
+                    self.modelFeeder.start()
+                else:
+                    for task in tasks[1:]:
+                        self.submit_pool_model(task, 0)
+            else:
+                self.modelPipeline = self.create_model_pipeline()
+                self.modelPipeline.start([self.create_model_job(*task) for task in tasks[1:]])
 
-        ms = ml.MeshSet()
+    def feed_model_pool(self, tasks):
 
-        self.lockLoadMeshLock()
+        # Each model is only put into the pool once its estimated memory fits into the budget
+        for listIndex, file in tasks:
+            reservedMemory = 0
+            if not (self.terminateProcessing):
+                reservedMemory = self.memoryBudget.reserve(self.estimate_model_memory(os.path.join(self.convertSettings.inputPath, file)))
+
+            self.submit_pool_model((listIndex, file), reservedMemory)
+
+    def submit_pool_model(self, task, reservedMemory):
 
-        combinedBoundsMin = [float('inf'),float('inf'),float('inf')]
-        combinedBoundsMax = [float('-inf'),float('-inf'),float('-inf')]
+        self.change_pool_pending_count(1)
+        self.modelPool.apply_async(process_model_in_worker, task,
+                                   callback=lambda result, reservedMemory=reservedMemory: self.pool_model_finished(result, reservedMemory),
+                                   error_callback=lambda exception, reservedMemory=reservedMemory: self.pool_model_failed(exception, reservedMemory))
 
+    def change_pool_pending_count(self, change):
+        self.poolPendingLock.acquire()
+        self.poolPendingCount += change
+        self.poolPendingLock.release()
+
+    def pool_model_finished(self, result, reservedMemory):
+        self.change_pool_pending_count(-1)
+        if(self.memoryBudget is not None):
+            self.memoryBudget.release(reservedMemory)
+        self.apply_model_result(result)
+
+    def pool_model_failed(self, exception, reservedMemory):
+        self.change_pool_pending_count(-1)
+        if(self.memoryBudget is not None):
+            self.memoryBudget.release(reservedMemory)
+        self.worker_failed(exception)
+
+    def estimate_model_memory(self, inputfile):
+        usesMeshlab = not (self.can_use_model_reader() and inputfile.lower().endswith(".ply")) or len(self.convertSettings.meshLODs) > 0
+        return Sequence_Memory_Budget.estimate_model_memory(inputfile, usesMeshlab, self.convertSettings.saveNormals)
+
+    def release_model_memory(self, job):
+        if(self.memoryBudget is not None and job.reservedMemory > 0):
+            self.memoryBudget.release(job.reservedMemory)
+            job.reservedMemory = 0
+
+    def create_model_pipeline(self):
+
+        # Reading the files, processing them and writing the results happens in separate stages,
+        # so that disk access and cpu work overlap. Only one thread writes, to keep the output I/O sequential
+        pipeline = Sequence_Pipeline.Pipeline(self.convertSettings.pipelineQueueSize, self.model_pipeline_failed)
+        pipeline.add_stage("read", self.read_model_job, self.convertSettings.readerThreads)
+        pipeline.add_stage("process", self.process_model_job, self.convertSettings.maxThreads)
+        pipeline.add_stage("write", self.write_model_stage, 1)
+        return pipeline
+
+    def model_pipeline_failed(self, job, exception):
+        self.release_model_memory(job)
+        self.processFinishedCB(True, "Error converting file: " + job.inputfile + " (" + str(exception) + ")")
+
+    def get_pipeline_counters(self):
+
+        # Throughput of each model conversion stage, only available when the models are converted with threads
+        if(self.modelPipeline is None):
+            return self.pipelineCounters
+        return self.modelPipeline.get_counters()
+
+    def count_pipeline_bytes(self, stageName, byteCount):
+        if(self.modelPipeline is not None):
+            self.modelPipeline.get_stage(stageName).count_bytes(byteCount)
+
+    def calculate_min_max_bounds(self, listIndex, file):
+        self.apply_bounds_result(self.get_model_bounds(listIndex, file))
+
+    def get_model_bounds(self, listIndex, file):
+
+        result = ModelResult()
+        result.listIndex = listIndex
+
+        if(self.terminateProcessing):
+            return result
 
         inputPath = os.path.join(self.convertSettings.inputPath, file)
+
+        if(self.conversionCache is not None):
+            source = self.conversionCache.get_source_info(inputPath, file)
+            entry = self.conversionCache.get_entry("bounds", file, source, "")
+            if(entry is not None):
+                result.boundsMin = np.array(entry["boundsMin"])
+                result.boundsMax = np.array(entry["boundsMax"])
+                result.finished = True
+                return result
+            result.cacheEntry = {"type" : "bounds", "file" : file, "source" : source, "settings" : ""}
+
+        # Most formats can be scanned for their bounds without loading the whole mesh
+        bounds = Sequence_Model_Reader.scan_bounds(inputPath)
+        if(bounds is not None):
+            result.boundsMin, result.boundsMax = bounds
+            result.finished = True
+            return result
+
+        ms = ml.MeshSet()
+
+        self.lockLoadMeshLock()
+
         try:
             ms.load_new_mesh(inputPath)
         except:
             self.unlockLoadMeshLock()
-            self.processFinishedCB(True, "Error opening file: " + inputPath)
-            return
+            return self.error_result(result, "Error opening file: " + inputPath)
 
         bounds = ms.current_mesh().bounding_box()
-        bMin = bounds.min()
-        bMax = bounds.max()
-        combinedBoundsMin = np.array([
-            min(combinedBoundsMin[0], bMin[0]),
-            min(combinedBoundsMin[1], bMin[1]),
-            min(combinedBoundsMin[2], bMin[2]),
-        ])
-        combinedBoundsMax = np.array([
-            max(combinedBoundsMax[0], bMax[0]),
-            max(combinedBoundsMax[1], bMax[1]),
-            max(combinedBoundsMax[2], bMax[2]),
-        ])
+        result.boundsMin = np.array(bounds.min())
+        result.boundsMax = np.array(bounds.max())
         ms.clear() # Keep memory usage at bay
 
         self.unlockLoadMeshLock()
 
-        self.convertSettings.metaData.extend_bounds(combinedBoundsMin, combinedBoundsMax)
-        self.processFinishedCB(False, "")
+        result.finished = True
+        return result
 
-        if self.debugMode:
-            print("Pre-Processed file: " + str(self.convertSettings.modelPaths.index(file)))
+    def apply_bounds_result(self, result):
+
+        if(result.finished):
+            self.convertSettings.metaData.extend_bounds(result.boundsMin, result.boundsMax)
+
+            if(result.cacheEntry is not None and self.conversionCache is not None):
+                result.cacheEntry["boundsMin"] = [float(x) for x in result.boundsMin]
+                result.cacheEntry["boundsMax"] = [float(x) for x in result.boundsMax]
+                self.conversionCache.add_entry(result.cacheEntry)
+
+        self.processFinishedCB(result.error, result.errorText)
 
+        if self.debugMode and result.finished:
+            print("Pre-Processed file: " + str(result.listIndex))
 
-    def convert_model(self, file):
+    def error_result(self, result, errorText):
+        result.error = True
+        result.errorText = errorText
+        return result
 
-        listIndex = self.convertSettings.modelPaths.index(file)
+    def convert_model(self, listIndex, file):
+        self.apply_model_result(self.process_model(listIndex, file))
+
+    def process_model(self, listIndex, file):
+        job = self.create_model_job(listIndex, file)
+        return self.write_model_job(self.process_model_job(self.read_model_job(job))).result
+
+    def create_model_job(self, listIndex, file):
+
+        job = ModelJob()
+        job.listIndex = listIndex
+        job.file = file
+        job.inputfile = os.path.join(self.convertSettings.inputPath, file)
+        job.outputfile = self.get_model_output_path(file)
+        job.result = ModelResult()
+        job.result.listIndex = listIndex
+        job.result.stageTimes = {}
+        return job
+
+    def read_model_job(self, job):
 
         if(self.terminateProcessing):
-            self.processFinishedCB(False, "")
-            return
+            job.done = True
+            return job
+
+        result = job.result
+        stageTimes = result.stageTimes
+        startTime = time.perf_counter()
+
+        # Delta encoded frames depend on their keyframe, so they can't be reused on their own
+        if(self.conversionCache is not None and not self.convertSettings.temporalDeltas):
+            source = self.conversionCache.get_source_info(job.inputfile, job.file)
+            settingsKey = self.get_model_settings_key()
+            entry = self.conversionCache.get_entry("model", job.file, source, settingsKey)
+            startTime = Sequence_Instrumentation.add_stage_time(stageTimes, "cache", startTime)
+            if(entry is not None and self.are_outputs_valid(entry)):
+                job.result = self.get_cached_model_result(result, entry)
+                job.result.cached = True
+                job.done = True
+                return job
+            result.cacheEntry = {"type" : "model", "file" : job.file, "source" : source, "settings" : settingsKey}
+
+        # Only the models converted by the pipeline are limited by the memory budget, the job holds its part until it has been written
+        if(self.memoryBudget is not None and self.modelPipeline is not None):
+            job.reservedMemory = self.memoryBudget.reserve(self.estimate_model_memory(job.inputfile))
+            startTime = Sequence_Instrumentation.add_stage_time(stageTimes, "memoryWait", startTime)
+
+        #Prefetch the files which can be read directly, so that the processing doesn't need to wait on the disk
+        if(self.can_use_model_reader() and job.inputfile.lower().endswith(".ply")):
+            try:
+                with open(job.inputfile, 'rb') as f:
+                    job.fileData = f.read()
+            except OSError:
+                self.error_result(result, "Error opening file: " + job.inputfile)
+                job.done = True
+                return job
+            self.count_pipeline_bytes("read", len(job.fileData))
+            result.bytesRead = len(job.fileData)
+            Sequence_Instrumentation.add_stage_time(stageTimes, "read", startTime)
+
+        return job
+
+    def process_model_job(self, job):
+
+        if(job.done or self.terminateProcessing):
+            job.done = True
+            return job
+
+        listIndex = job.listIndex
+        result = job.result
+        stageTimes = result.stageTimes
+        model = None
+
+        #Clean .ply files can be read directly, as long as no meshlab filters need to be applied
+        if(job.fileData is not None):
+            startTime = time.perf_counter()
+            try:
+                model = Sequence_Model_Reader.read_ply_model(job.inputfile, self.convertSettings.saveNormals, job.fileData)
+            except (ValueError, OSError):
+                model = None
+            job.fileData = None
+            Sequence_Instrumentation.add_stage_time(stageTimes, "parse", startTime)
+
+            if(model is not None):
+                errorText = self.check_model_attributes(listIndex, model)
+                if(len(errorText) > 0):
+                    self.error_result(result, errorText)
+                    job.done = True
+                    return job
+
+        if(model is None):
+            model = self.load_model_meshset(job.inputfile, listIndex, result)
+            if(model is None):
+                job.done = True
+                return job
 
-        splitted_file = file.split(".")
-        splitted_file.pop() # We remove the last element, which is the file ending
-        file_name = ''.join(splitted_file)
+        if(self.terminateProcessing):
+            job.done = True
+            return job
+
+        hasNormals = False
+        if(self.convertSettings.generateNormals):
+            hasNormals = True
+
+        if(model.normals is not None and len(model.normals) > 0 and self.convertSettings.saveNormals):
+
+            # Check if there are actual normals inside the array, or if it is just empty
+            x = model.normals[0][0]
+            y = model.normals[0][1]
+            z = model.normals[0][2]
+
+            if(not (math.isclose(x, 0.0) and math.isclose(y, 0.0) and math.isclose(z, 0.0))):
+                hasNormals = True
+
+        #The levels of detail are simplified from the unchanged model, as packing it modifies its arrays
+        startTime = time.perf_counter()
+        lodModels = []
+        if(len(self.convertSettings.meshLODs) > 0 and model.faces is not None and len(model.faces) > 0):
+            lodModels = self.simplify_model(model)
+            startTime = Sequence_Instrumentation.add_stage_time(stageTimes, "simplify", startTime)
+
+        if(self.convertSettings.optimizeMeshes and model.faces is not None and len(model.faces) > 0):
+            self.optimize_model_order(listIndex, model)
+            startTime = Sequence_Instrumentation.add_stage_time(stageTimes, "optimize", startTime)
+
+        if(self.convertSettings.useCompression == False):
+            # We still need to calculate the max bounds
+            result.boundsMin = model.boundsMin
+            result.boundsMax = model.boundsMax
+
+        result.vertexCount, job.packedData = self.pack_model(model, hasNormals)
+        result.headerSize = len(job.packedData[0])
+
+        job.lodPackedData = []
+        result.lodVertexCounts = []
+        result.lodIndiceCounts = []
+        result.lodHeaderSizes = []
+        for lodModel in lodModels:
+            if(self.convertSettings.optimizeMeshes):
+                Sequence_Ordering.apply_mesh_order(lodModel, Sequence_Ordering.optimize_mesh_order(lodModel.faces, lodModel.vertices))
+            lodVertexCount, lodPackedData = self.pack_model(lodModel, hasNormals)
+            job.lodPackedData.append(lodPackedData)
+            result.lodVertexCounts.append(lodVertexCount)
+            result.lodIndiceCounts.append(len(lodModel.faces) * 3)
+            result.lodHeaderSizes.append(len(lodPackedData[0]))
+
+        startTime = Sequence_Instrumentation.add_stage_time(stageTimes, "pack", startTime)
+
+        if(self.uses_frame_compression()):
+            codec = self.get_frame_codec()
+            if(codec is None):
+                self.error_result(result, "The compression codec is not installed: " + self.convertSettings.frameCompression)
+                job.done = True
+                return job
+            job.packedData = [job.packedData[0]] + Sequence_Compression.compress_frame(job.packedData[1:], codec, self.convertSettings.frameChunkSize)
+            job.lodPackedData = [[data[0]] + Sequence_Compression.compress_frame(data[1:], codec, self.convertSettings.frameChunkSize) for data in job.lodPackedData]
+            Sequence_Instrumentation.add_stage_time(stageTimes, "compress", startTime)
+
+        if(model.faces is not None):
+            result.indiceCount = len(model.faces) * 3
+            if(self.convertSettings.temporalDeltas):
+                result.topologyHash = self.get_topology_hash(result.vertexCount, model.faces)
+        else:
+            result.indiceCount = 0
+
+        if(self.convertSettings.isPointcloud == True):
+            result.geometryType = Sequence_Metadata.GeometryType.point
+        else:
+            if(self.convertSettings.hasUVs == False):
+                result.geometryType = Sequence_Metadata.GeometryType.mesh
+            else:
+                result.geometryType = Sequence_Metadata.GeometryType.texturedMesh
+
+        result.hasUVs = self.convertSettings.hasUVs
+        result.hasNormals = hasNormals
+        result.averageNormal = model.averageNormal
+
+        if(result.cacheEntry is not None):
+            result.cacheEntry["isPointcloud"] = self.convertSettings.isPointcloud
+            result.cacheEntry["hasUVs"] = result.hasUVs
+            result.cacheEntry["hasNormals"] = result.hasNormals
+            result.cacheEntry["vertexCount"] = result.vertexCount
+            result.cacheEntry["indiceCount"] = result.indiceCount
+            result.cacheEntry["headerSize"] = result.headerSize
+            result.cacheEntry["geometryType"] = int(result.geometryType)
+            result.cacheEntry["boundsMin"] = [float(x) for x in model.boundsMin]
+            result.cacheEntry["boundsMax"] = [float(x) for x in model.boundsMax]
+            result.cacheEntry["averageNormal"] = result.averageNormal
+            result.cacheEntry["normalSign"] = result.normalSign
+            result.cacheEntry["lodVertexCounts"] = result.lodVertexCounts
+            result.cacheEntry["lodIndiceCounts"] = result.lodIndiceCounts
+            result.cacheEntry["lodHeaderSizes"] = result.lodHeaderSizes
+
+        return job
+
+    def write_model_job(self, job):
+
+        if(job.done):
+            return job
+
+        startTime = time.perf_counter()
+        with open(job.outputfile, 'wb') as f:
+            for data in job.packedData:
+                f.write(data)
+        job.packedData = None
+
+        result = job.result
+        outputSize = os.path.getsize(job.outputfile)
+        self.count_pipeline_bytes("write", outputSize)
+        outputs = {os.path.basename(job.outputfile) : outputSize}
+
+        for lod, lodPackedData in enumerate(job.lodPackedData):
+            lodfile = self.get_lod_output_path(job.file, lod + 1)
+            os.makedirs(os.path.dirname(lodfile), exist_ok=True)
+            with open(lodfile, 'wb') as f:
+                for data in lodPackedData:
+                    f.write(data)
+            lodSize = os.path.getsize(lodfile)
+            self.count_pipeline_bytes("write", lodSize)
+            outputs[os.path.relpath(lodfile, self.convertSettings.outputPath)] = lodSize
+        job.lodPackedData = []
+
+        if(result.cacheEntry is not None):
+            result.cacheEntry["outputs"] = outputs
+
+        result.bytesWritten = sum(outputs.values())
+        Sequence_Instrumentation.add_stage_time(result.stageTimes, "write", startTime)
+
+        result.finished = True
+        return job
+
+    def write_model_stage(self, job):
+        self.write_model_job(job)
+        self.release_model_memory(job)
+        self.apply_model_result(job.result)
+
+    def get_model_settings_key(self):
+
+        # All settings which change the content of the converted model files
+        settings = self.convertSettings
+        key = [settings.useCompression, settings.saveNormals, settings.generateNormals, settings.invertNormals,
+               settings.decimatePointcloud, settings.decimatePercentage, settings.mergePoints, settings.mergeDistance]
+
+        # Compressed positions are stored relative to the bounds of the whole sequence
+        if(settings.useCompression):
+            key.append(settings.metaData.get_metadata_bounds())
+            key += [settings.positionEncoding, settings.positionBits]
+
+        if(settings.normalEncoding != "float"):
+            key.append(settings.normalEncoding)
+
+        if(settings.optimizeMeshes):
+            key.append(["optimizeMeshes", Sequence_Ordering.vertexCacheSize])
+
+        if(settings.sortPoints or settings.decimationMode != "random"):
+            key += [settings.sortPoints, settings.decimationMode]
+
+        if(len(settings.pointcloudLODs) > 0):
+            key.append(settings.pointcloudLODs)
+
+        if(len(settings.meshLODs) > 0):
+            key.append(["meshLODs"] + settings.meshLODs)
+
+        if(len(settings.frameCompression) > 0):
+            key += [settings.frameCompression, settings.frameChunkSize]
+
+        return json.dumps(key)
+
+    def are_outputs_valid(self, entry):
+
+        for outputfile, size in entry["outputs"].items():
+            path = os.path.join(self.convertSettings.outputPath, outputfile)
+            if not (os.path.exists(path) and os.path.getsize(path) == size):
+                return False
+        return True
+
+    def get_cached_model_result(self, result, entry):
+
+        cachedModel = Sequence_Model_Reader.ModelData()
+        cachedModel.isPointcloud = entry["isPointcloud"]
+        cachedModel.hasUVs = entry["hasUVs"]
+
+        errorText = self.check_model_attributes(result.listIndex, cachedModel)
+        if(len(errorText) > 0):
+            return self.error_result(result, errorText)
+
+        result.vertexCount = entry["vertexCount"]
+        result.indiceCount = entry["indiceCount"]
+        result.headerSize = entry["headerSize"]
+        result.geometryType = Sequence_Metadata.GeometryType(entry["geometryType"])
+        result.hasUVs = entry["hasUVs"]
+        result.hasNormals = entry["hasNormals"]
+        result.averageNormal = entry["averageNormal"]
+        result.normalSign = entry["normalSign"]
+        result.lodVertexCounts = entry["lodVertexCounts"]
+        result.lodIndiceCounts = entry["lodIndiceCounts"]
+        result.lodHeaderSizes = entry["lodHeaderSizes"]
+
+        if(self.convertSettings.useCompression == False):
+            result.boundsMin = np.array(entry["boundsMin"])
+            result.boundsMax = np.array(entry["boundsMax"])
+
+        result.finished = True
+        return result
+
+    def can_use_model_reader(self):
+        return self.convertSettings.useModelReader and not self.convertSettings.mergePoints and not self.convertSettings.generateNormals
+
+    def check_model_attributes(self, listIndex, model):
+
+        if(listIndex == 0):
+            self.convertSettings.isPointcloud = model.isPointcloud
+            self.convertSettings.hasUVs = model.hasUVs
+        else:
+            if(self.convertSettings.hasUVs != model.hasUVs):
+                # The sequence has different attributes, which is not allowed
+                return "Error: Some frames with UVs, some without. All frames need to be consistent with this attribute!"
+            if(self.convertSettings.isPointcloud != model.isPointcloud):
+                return "Error: Some frames are Pointclouds, some are meshes. Mixed sequences are not allowed!"
+
+        return ""
 
-        inputfile = os.path.join(self.convertSettings.inputPath, file)
-        outputfile = os.path.join(self.convertSettings.outputPath, file_name + ".ply")
+    def load_model_meshset(self, inputfile, listIndex, result):
 
+        # Loads and filters the model with pymeshlab. Returns None if an error occured or the conversion was cancelled
         ms = ml.MeshSet()
+        stageTimes = result.stageTimes if result.stageTimes is not None else {}
+        startTime = time.perf_counter()
 
         self.lockLoadMeshLock() # If we don't lock the mesh loading process, crashes might occur
+        startTime = Sequence_Instrumentation.add_stage_time(stageTimes, "lockWait", startTime)
 
         try:
             ms.load_new_mesh(inputfile)
         except:
             self.unlockLoadMeshLock()
-            self.processFinishedCB(True, "Error opening file: " + inputfile)
-            return
+            self.error_result(result, "Error opening file: " + inputfile)
+            return None
+
+        result.bytesRead = os.path.getsize(inputfile)
+        startTime = Sequence_Instrumentation.add_stage_time(stageTimes, "load", startTime)
 
         if(self.terminateProcessing):
-            self.processFinishedCB(False, "")
             self.unlockLoadMeshLock()
-            return
+            return None
+
+        model = Sequence_Model_Reader.ModelData()
 
         faceCount = len(ms.current_mesh().face_matrix())
 
         #Is the file a mesh or pointcloud?
         if(faceCount > 0):
-            pointcloud = False
+            model.isPointcloud = False
         else:
-            pointcloud = True
+            model.isPointcloud = True
 
         if(ms.current_mesh().has_wedge_tex_coord() == True or ms.current_mesh().has_vertex_tex_coord() == True):
-            hasUvs = True
+            model.hasUVs = True
         else:
-            hasUvs = False
+            model.hasUVs = False
 
-        if(listIndex == 0):
-            self.convertSettings.isPointcloud = pointcloud
-            self.convertSettings.hasUVs = hasUvs
-        else:
-            if(self.convertSettings.hasUVs != hasUvs):
-                # The sequence has different attributes, which is not allowed
-                self.processFinishedCB(True, "Error: Some frames with UVs, some without. All frames need to be consistent with this attribute!")
-                self.unlockLoadMeshLock()
-                return
-            if(self.convertSettings.isPointcloud != pointcloud):
-                self.processFinishedCB(True, "Error: Some frames are Pointclouds, some are meshes. Mixed sequences are not allowed!")
-                self.unlockLoadMeshLock()
-                return
+        errorText = self.check_model_attributes(listIndex, model)
+        if(len(errorText) > 0):
+            self.unlockLoadMeshLock()
+            self.error_result(result, errorText)
+            return None
 
         if(self.convertSettings.mergePoints):
             ms.apply_filter('meshing_merge_close_vertices', threshold= ml.PercentageValue (self.convertSettings.mergeDistance))
@@ -265,354 +1035,803 @@ class SequenceConverter:
         if(self.convertSettings.isPointcloud == False and ms.current_mesh().has_wedge_tex_coord() == True):
             ms.compute_texcoord_transfer_wedge_to_vertex()
 
-        normals = None
         normals = ms.current_mesh().vertex_normal_matrix().astype(np.float32)
 
-        self.convertSettings.hasNormals = False
-        if(self.convertSettings.generateNormals):
-            self.convertSettings.hasNormals = True
-
-        if(len(normals) > 0 and self.convertSettings.saveNormals):
-            
-            # Check if there are actual normals inside the array, or if it is just empty
-            x = normals[0][0]
-            y = normals[0][1]
-            z = normals[0][2]
-
-            if(not (math.isclose(x, 0.0) and math.isclose(y, 0.0) and math.isclose(z, 0.0))):
-                self.convertSettings.hasNormals = True
-
-
         # We'll later flip the x-Axis. For meshes, this also requires us to flip the face orientation
         if(self.convertSettings.isPointcloud == False):
             ms.meshing_invert_face_orientation(forceflip = True)
 
 
+        startTime = Sequence_Instrumentation.add_stage_time(stageTimes, "filter", startTime)
+
         # For pointclouds, normals can be estimated
         if(self.convertSettings.generateNormals and self.convertSettings.isPointcloud):
             ms.compute_normal_for_point_clouds(k = 10, flipflag = False, smoothiter = 3)
             normals = ms.current_mesh().vertex_normal_matrix().astype(np.float32)
+            startTime = Sequence_Instrumentation.add_stage_time(stageTimes, "normals", startTime)
 
             #Pointcloud normal estimation leads to randomly flipped normals between frames
 
-            #To counteract this, we calculate the average normal direction of the pointcloud, and then compare it to the
-            #last frame's average normal
-            averageNormal = [np.average(normals[:,0]), np.average(normals[:,1]), np.average(normals[:,2])]
+            #To counteract this, we store the average normal direction of the pointcloud. Once all frames are
+            #converted, orient_pointcloud_normals() compares it to the last frame's average normal
+            model.averageNormal = [float(np.average(normals[:,0])), float(np.average(normals[:,1])), float(np.average(normals[:,2]))]
 
-            if not self.firstEstimation:
+        if(self.terminateProcessing):
+            self.unlockLoadMeshLock()
+            return None
 
-                # Normalize the vectors
-                v1_norm = averageNormal / np.linalg.norm(averageNormal)
-                v2_norm = self.lastAverageNormal / np.linalg.norm(self.lastAverageNormal)
+        model.normals = normals
+        model.vertices = ms.current_mesh().vertex_matrix().astype(np.float32)
 
-                # The dot product let's us know how if the average normals point in the same direction
-                # (-1 for opposite, 1 for same direction)
-                dot_product = np.dot(v1_norm, v2_norm)
+        #Load type specific attributes
+        if(self.convertSettings.isPointcloud == True):
+            #Meshlab stores the colors as BGRA, convert them to RGBA
+            model.colors = np.ascontiguousarray(ms.current_mesh().vertex_color_array()).view(np.uint8).reshape(-1, 4)[..., [2,1,0,3]]
 
-                #Flip normals if the average normal differs too much from the last frame
-                if(dot_product < 0.5):
-                    normals = normals * -1
-                    averageNormal = np.multiply(averageNormal, -1)
+        else:
+            model.faces = ms.current_mesh().face_matrix()
+            if(self.convertSettings.hasUVs == True):
+                model.uvs = ms.current_mesh().vertex_tex_coord_matrix().astype(np.float32)
 
-                if(self.convertSettings.invertNormals):
-                    normals = normals * -1
+        bounds = ms.current_mesh().bounding_box()
+        model.boundsMin = np.array(bounds.min())
+        model.boundsMax = np.array(bounds.max())
 
-            self.lastAverageNormal = averageNormal
-            self.firstEstimation = False
+        ms.clear() # Keep memory usage at bay
+        self.unlockLoadMeshLock()
+        Sequence_Instrumentation.add_stage_time(stageTimes, "load", startTime)
+
+        return model
+
+    def simplify_model(self, model):
+
+        #Every level of detail is simplified from the full model with a quadric edge collapse. The vertices are not moved,
+        #and each vertex carries its original index through the simplification, so that its normal and uv can be copied over
+        lodModels = []
+        mesh = ml.Mesh(vertex_matrix = model.vertices.astype(np.float64), face_matrix = np.asarray(model.faces, dtype=np.int32),
+                       v_scalar_array = np.arange(len(model.vertices), dtype=np.float64))
+
+        for percentage in self.convertSettings.meshLODs:
+            ms = ml.MeshSet()
+            ms.add_mesh(mesh)
+
+            #The meshlab filters crash when they run on multiple threads at once, even on separate MeshSets. So only the filters
+            #are locked, and the simplifications of the frames still run one after another, unless the process pool is used
+            self.lockLoadMeshLock()
+            try:
+                ms.meshing_decimation_quadric_edge_collapse(targetfacenum = max(1, int(len(model.faces) * (percentage / 100))), preserveboundary = True,
+                                                            preservenormal = True, preservetopology = True, optimalplacement = False, autoclean = True)
+                ms.meshing_remove_unreferenced_vertices()
+            finally:
+                self.unlockLoadMeshLock()
 
-        if(self.terminateProcessing):
-            self.processFinishedCB(False, "")
-            self.unlockLoadMeshLock()
-            return
+            vertexIndices = np.rint(ms.current_mesh().vertex_scalar_array()).astype(np.int64)
 
-        vertices = None
-        vertice_colors = None
-        faces = None
-        uvs = None
+            lodModel = Sequence_Model_Reader.ModelData()
+            lodModel.isPointcloud = False
+            lodModel.hasUVs = model.hasUVs
+            lodModel.vertices = model.vertices[vertexIndices]
+            lodModel.faces = ms.current_mesh().face_matrix().astype(np.int32)
+            if(model.normals is not None and len(model.normals) == len(model.vertices)):
+                lodModel.normals = model.normals[vertexIndices]
+            if(model.uvs is not None):
+                lodModel.uvs = model.uvs[vertexIndices]
 
-        vertices = ms.current_mesh().vertex_matrix().astype(np.float32)
+            ms.clear() # Keep memory usage at bay
+            lodModels.append(lodModel)
 
-        #Load type specific attributes
-        if(self.convertSettings.isPointcloud == True):
-            vertice_colors = ms.current_mesh().vertex_color_array()
+        return lodModels
 
-        else:
-            faces = ms.current_mesh().face_matrix()
-            if(self.convertSettings.hasUVs == True):
-                uvs = ms.current_mesh().vertex_tex_coord_matrix().astype(np.float32)
+    def optimize_model_order(self, listIndex, model):
 
-        #Check if the mesh has pre-existing normals
+        #Frames with the same topology as the first frame reuse its order. This skips the optimization
+        #and keeps the topology of the sequence constant, which the temporal delta encoding depends on
+        topologyHash = self.get_topology_hash(len(model.vertices), model.faces)
+        meshOrder = self.meshOrder
 
-        vertexCount = len(vertices)
+        if(meshOrder is None or meshOrder.topologyHash != topologyHash):
+            meshOrder = Sequence_Ordering.optimize_mesh_order(model.faces, model.vertices)
+            meshOrder.topologyHash = topologyHash
+            if(listIndex == 0):
+                self.meshOrder = meshOrder
 
-        if(faces is not None):
-            indiceCount = len(faces) * 3
-        else:
-            indiceCount = 0
+        Sequence_Ordering.apply_mesh_order(model, meshOrder)
 
-        bounds = ms.current_mesh().bounding_box()
+    def uses_point_ordering(self):
+        return self.convertSettings.sortPoints or len(self.convertSettings.pointcloudLODs) > 0 or (self.convertSettings.decimatePointcloud and self.convertSettings.decimationMode != "random")
 
-        if(self.convertSettings.isPointcloud == True):
-            geoType = Sequence_Metadata.GeometryType.point
+    def get_point_order(self, model, targetCount):
+
+        #Returns the indices of the points to write, in Morton order. Compressed sequences use the bounds of
+        #the whole sequence, so that the grid is the same for all frames
+        if(self.convertSettings.useCompression):
+            boundsMin = self.convertSettings.metaData.boundsMin
+            boundsMax = self.convertSettings.metaData.boundsMax
         else:
-            if(self.convertSettings.hasUVs == False):
-                geoType = Sequence_Metadata.GeometryType.mesh
+            boundsMin = model.boundsMin
+            boundsMax = model.boundsMax
+
+        order, sortedCodes = Sequence_Ordering.get_morton_order(model.vertices, boundsMin, boundsMax)
+
+        #The selected indices are increasing, so the selected codes stay sorted
+        if(self.convertSettings.decimatePointcloud):
+            if(self.convertSettings.decimationMode == "voxel"):
+                selection = Sequence_Ordering.get_voxel_indices(sortedCodes, targetCount)
+            elif(self.convertSettings.decimationMode == "stride"):
+                selection = Sequence_Ordering.get_stride_indices(len(order), targetCount)
             else:
-                geoType = Sequence_Metadata.GeometryType.texturedMesh
+                selection = np.sort(np.random.permutation(len(order))[:targetCount])
+            order = order[selection]
+            sortedCodes = sortedCodes[selection]
 
-        if(self.terminateProcessing):
-            self.processFinishedCB(False, "")
-            self.unlockLoadMeshLock()
-            return
+        #For levels of detail, the points are reordered so that every prefix of the frame is a uniform subsample
+        if(len(self.convertSettings.pointcloudLODs) > 0):
+            order = order[Sequence_Ordering.get_lod_order(sortedCodes)]
 
-        ms.clear() # Keep memory usage at bay
-        self.unlockLoadMeshLock()
+        return order
+
+    def pack_model(self, model, hasNormals):
+
+        # Returns the vertex count and the content of the output file, as a list of the header and the data buffers
+        vertices = model.vertices
+        normals = model.normals
+        vertexCount = len(vertices)
 
         #The meshlab exporter doesn't support all the features we need, so we export the files manually
         #to PLY with our very stringent structure. This is needed because we want to keep the
         #work on the Unity side as low as possible, so we basically want to load the data from disk into the memory
         #without needing to change anything
-        with open(outputfile, 'wb') as f:
 
-            #If pointcloud decimation is enabled, calculate how many points were going to write
-            if(self.convertSettings.decimatePointcloud):
-                vertexCount = int(len(vertices) * (self.convertSettings.decimatePercentage / 100))
+        #If pointcloud decimation is enabled, calculate how many points were going to write
+        if(self.convertSettings.decimatePointcloud):
+            vertexCount = int(len(vertices) * (self.convertSettings.decimatePercentage / 100))
+
+        #Sorted pointclouds are reordered and decimated by selecting the points in their new order
+        pointOrder = None
+        if(self.convertSettings.isPointcloud and self.uses_point_ordering()):
+            pointOrder = self.get_point_order(model, vertexCount)
+            vertexCount = len(pointOrder)
+
+        faceCount = 0 if model.faces is None else len(model.faces)
+        headerASCII = self.create_model_header(vertexCount, faceCount)
+
+        #Flip vertice positions to match Unity's coordinate system
+        vertices[:,0] *= -1
+
+        if(self.uses_quantized_positions()):
+            boundsCenter, boundsSize = self.convertSettings.metaData.get_metadata_bounds()
+            vertices = Sequence_Quantization.quantize_positions(vertices, self.convertSettings.positionEncoding, self.convertSettings.positionBits, boundsCenter, boundsSize)
+
+        elif(self.convertSettings.useCompression):
+            # We already did a prepass to calculate the max bounds
+            boundsCenter, boundsSize = self.convertSettings.metaData.get_metadata_bounds()
+            vertices = vertices - boundsCenter
+            vertices = vertices / boundsSize
+
+        #All attributes of a vertex are interleaved into one record, exactly like described in the header.
+        #Writing into the preallocated records converts the attributes to half precision if needed,
+        #so no intermediate copies of the frame are created
+        vertexData = np.empty(len(vertices), dtype=self.get_vertex_dtype(hasNormals))
+        vertexData["position"] = vertices
+
+        if(hasNormals and self.uses_octahedral_normals()):
+            vertexData["normal"] = Sequence_Quantization.encode_octahedral(normals * np.array([-1, 1, 1], dtype=np.float32), self.convertSettings.normalEncoding)
+
+        elif(hasNormals):
+            vertexData["normal"] = normals
+            vertexData["normal"][:,0] *= -1
+
+        if(self.convertSettings.isPointcloud == True):
+
+            #Skip the alpha channel when compressing
+            if(self.convertSettings.useCompression):
+                vertexData["color"] = model.colors[..., 0:3]
+            else:
+                vertexData["color"] = model.colors
+
+            if(pointOrder is not None):
+                vertexData = vertexData[pointOrder]
+
+            #Decimate n random elements to reduce points (if enabled)
+            elif(self.convertSettings.decimatePointcloud):
+                np.random.shuffle(vertexData)
+                vertexData = vertexData[0:vertexCount]
+
+            return vertexCount, [headerASCII, vertexData.view(np.uint8)]
+
+        else:
+
+            if(self.convertSettings.hasUVs == True):
+                vertexData["uv"] = model.uvs
+
+            #Each face is written as one packed record, containing the indice count (always 3) and the indices
+            faceData = np.empty(len(model.faces), dtype=faceDtype)
+            faceData["count"] = 3
+            faceData["indices"] = model.faces
+
+            return vertexCount, [headerASCII, vertexData.view(np.uint8), faceData.view(np.uint8)]
 
-            #constructing the ascii header
-            header = "ply" + "\n"
-            header += "format binary_little_endian 1.0" + "\n"
-            header += "comment Exported for use in Unity Geometry Streaming Plugin" + "\n"
-            header += "element vertex " + str(vertexCount) + "\n"
 
-            propertyText = "property " + "half" if self.convertSettings.useCompression else "float" + " "
+    def create_model_header(self, vertexCount, faceCount, comment = ""):
 
+        #constructing the ascii header
+        header = "ply" + "\n"
+        header += "format binary_little_endian 1.0" + "\n"
+        header += "comment Exported for use in Unity Geometry Streaming Plugin" + "\n"
+        header += "element vertex " + str(vertexCount) + "\n"
+
+        propertyText = "property " + "half" if self.convertSettings.useCompression else "float" + " "
+
+        if(self.uses_quantized_positions()):
+            header += Sequence_Quantization.get_position_header(self.convertSettings.positionEncoding)
+        else:
             header += propertyText + "x" + "\n"
             header += propertyText + "y" + "\n"
             header += propertyText + "z" + "\n"
 
+        if(self.uses_octahedral_normals()):
+            header += Sequence_Quantization.get_normal_header(self.convertSettings.normalEncoding)
+        else:
             header += propertyText + "nx" + "\n"
             header += propertyText + "ny" + "\n"
             header += propertyText + "nz" + "\n"
 
-            if(self.convertSettings.isPointcloud == True):
-                header += "property uchar red" + "\n"
-                header += "property uchar green" + "\n"
-                header += "property uchar blue" + "\n"
-                if(not self.convertSettings.useCompression):
-                    header += "property uchar alpha" + "\n"
+        if(self.convertSettings.isPointcloud == True):
+            header += "property uchar red" + "\n"
+            header += "property uchar green" + "\n"
+            header += "property uchar blue" + "\n"
+            if(not self.convertSettings.useCompression):
+                header += "property uchar alpha" + "\n"
 
-            else:
-                if(self.convertSettings.hasUVs == True):
-                    header += propertyText + "s" + "\n"
-                    header += propertyText + "t" + "\n"
+        else:
+            if(self.convertSettings.hasUVs == True):
+                header += propertyText + "s" + "\n"
+                header += propertyText + "t" + "\n"
 
-                header += "element face " + str(len(faces)) + "\n"
-                header += "property list uchar uint vertex_indices" + "\n"
+            header += "element face " + str(faceCount) + "\n"
+            header += "property list uchar uint vertex_indices" + "\n"
 
-            header += "end_header\n"
+        if(len(comment) > 0):
+            header += "comment " + comment + "\n"
 
-            headerASCII = header.encode('ascii')
-            headerSize = len(headerASCII)
+        if(self.uses_frame_compression()):
+            header += "comment chunked " + self.convertSettings.frameCompression + "\n"
 
-            f.write(headerASCII)
+        header += "end_header\n"
 
-            byteCombination = []
+        return header.encode('ascii')
 
-            #Flip vertice positions and normals to match Unity's coordinate system
-            vertices[:,0] *= -1
-            normals[:,0] *= -1
+    def apply_model_result(self, result):
 
-            if(self.convertSettings.useCompression):
-                # We already did a prepass to calculate the max bounds
-                boundsCenter, boundsSize = self.convertSettings.metaData.get_metadata_bounds()
-                vertices = vertices - boundsCenter
-                vertices = vertices / boundsSize
-                vertices = vertices.astype(dtype=np.float16, casting='same_kind')
-            else:
-                # We still need to calculate the max bounds
-                self.convertSettings.metaData.extend_bounds(bounds.min(), bounds.max())
+        if(result.finished):
+            if(result.boundsMin is not None):
+                self.convertSettings.metaData.extend_bounds(result.boundsMin, result.boundsMax)
 
-            verticePositionsBytes = np.frombuffer(vertices.tobytes(), dtype=np.uint8)
-            if(self.convertSettings.useCompression):
-                verticePositionsBytes = np.reshape(verticePositionsBytes, (-1, 6)) # 3 * 2 bytes per vertex
-            else:
-                verticePositionsBytes = np.reshape(verticePositionsBytes, (-1, 12)) # 3 * 4 bytes per vertex
-            byteCombination.append(verticePositionsBytes)
+            if(result.averageNormal is not None):
+                self.averageNormals[result.listIndex] = result.averageNormal
+                self.normalSigns[result.listIndex] = result.normalSign
+            if(result.topologyHash is not None):
+                self.topologyHashes[result.listIndex] = result.topologyHash
+            self.convertSettings.metaData.set_metadata_Model(result.vertexCount, result.indiceCount, result.headerSize, result.geometryType, result.hasUVs, result.hasNormals, self.convertSettings.useCompression, result.listIndex)
 
-            if(self.convertSettings.hasNormals):
+            if(self.convertSettings.isPointcloud and len(self.convertSettings.pointcloudLODs) > 0):
+                lodPercentages = self.convertSettings.pointcloudLODs
+                self.convertSettings.metaData.set_metadata_lods(lodPercentages, Sequence_Ordering.get_lod_counts(result.vertexCount, lodPercentages), result.listIndex)
 
-                if(self.convertSettings.useCompression):
-                    normals = normals.astype(dtype=np.float16, casting='same_kind')  #Squash normals into half precision
+            if(not self.convertSettings.isPointcloud and len(self.convertSettings.meshLODs) > 0):
+                self.convertSettings.metaData.set_metadata_lods(self.convertSettings.meshLODs, [result.vertexCount] + result.lodVertexCounts, result.listIndex,
+                                                                [result.indiceCount] + result.lodIndiceCounts, [result.headerSize] + result.lodHeaderSizes)
 
-                verticeNormalsBytes = np.frombuffer(normals.tobytes(), dtype=np.uint8)
+            if(result.cacheEntry is not None and self.conversionCache is not None):
+                self.conversionCache.add_entry(result.cacheEntry)
 
-                if(self.convertSettings.useCompression):
-                    verticeNormalsBytes = np.reshape(verticeNormalsBytes, (-1, 6)) # 3 * 2 bytes per vertex
-                else:
-                    verticeNormalsBytes = np.reshape(verticeNormalsBytes, (-1, 12)) # 3 * 4 bytes per vertex
-                byteCombination.append(verticeNormalsBytes)
+            if(self.conversionStats is not None):
+                self.conversionStats.add_frame("model", result.listIndex, self.convertSettings.modelPaths[result.listIndex], result.stageTimes or {},
+                                               result.bytesRead, result.bytesWritten, result.cached, result.vertexCount, result.indiceCount, self.get_queue_depths())
 
+        self.processFinishedCB(result.error, result.errorText)
 
-            #Constructing the mesh data, as binary array
-            if(self.convertSettings.isPointcloud == True):
+        if self.debugMode and result.finished:
+            print("Processed file: " + str(result.listIndex))
 
-                verticeColorsBytes = np.frombuffer(vertice_colors.tobytes(), dtype=np.uint8)
+    def get_queue_depths(self):
 
-                #Reshape arrays into 2D array, so that the elements of one vertex each occupy one row
-                verticeColorsBytes = np.reshape(verticeColorsBytes, (-1, 4))
+        # The amount of models waiting in front of each stage, or inside of the process pool
+        queueDepths = {}
+        if(self.modelPipeline is not None):
+            queueDepths = self.modelPipeline.get_queue_depths()
+        elif(self.modelPool is not None):
+            queueDepths["pool"] = self.poolPendingCount
+        return queueDepths
 
-                #Convert colors from BGRA to RGBA (or to RGB if alpha channel is skipped)
-                if(self.convertSettings.useCompression):
-                    verticeColorsBytes = verticeColorsBytes[..., [2,1,0]]
-                else:
-                    verticeColorsBytes = verticeColorsBytes[..., [2,1,0,3]]
+    def get_model_output_path(self, file):
+
+        splitted_file = file.split(".")
+        splitted_file.pop() # We remove the last element, which is the file ending
+        file_name = ''.join(splitted_file)
 
-                byteCombination.append(verticeColorsBytes)
+        return os.path.join(self.convertSettings.outputPath, file_name + ".ply")
 
-                body = np.concatenate(byteCombination, axis = 1)
+    def get_lod_output_path(self, file, lod):
+        # The levels of detail have the same file names as the frames, inside of a lod<n> subfolder
+        outputfile = self.get_model_output_path(file)
+        return os.path.join(os.path.dirname(outputfile), "lod" + str(lod), os.path.basename(outputfile))
 
-                #Decimate n random elements to reduce points (if enabled)
-                if(self.convertSettings.decimatePointcloud):
-                    np.random.shuffle(body)
-                    body = body[0:vertexCount]
+    def orient_pointcloud_normals(self):
 
-                #Flatten the array into a 1D array
-                body = body.ravel()
+        #The orientation of each frame depends on the previous frame, so this pass runs sequentially
+        #after all frames have been converted. It only compares the average normals and then flips the normals
+        #of the affected frames directly in the written files
+        lastAverageNormal = None
 
-            else:
+        for listIndex, averageNormal in enumerate(self.averageNormals):
+
+            if(averageNormal is None):
+                continue
+
+            averageNormal = np.array(averageNormal, dtype=np.float32)
+            sign = 1
 
-                if(self.convertSettings.hasUVs == True):
-                    if(self.convertSettings.useCompression):
-                        uvs = uvs.astype(dtype=np.float16, casting='same_kind') 
+            if(lastAverageNormal is not None):
 
-                    uvsBytes = np.frombuffer(uvs.tobytes(), dtype=np.uint8)
+                # Normalize the vectors
+                v1_norm = averageNormal / np.linalg.norm(averageNormal)
+                v2_norm = lastAverageNormal / np.linalg.norm(lastAverageNormal)
 
-                    if(self.convertSettings.useCompression):
-                        uvsBytes = np.reshape(uvsBytes, (-1, 4)) # 2 * 2 bytes per uv
-                    else:
-                        uvsBytes = np.reshape(uvsBytes, (-1, 8))
+                # The dot product let's us know how if the average normals point in the same direction
+                # (-1 for opposite, 1 for same direction)
+                dot_product = np.dot(v1_norm, v2_norm)
 
-                    byteCombination.append(uvsBytes)
+                #Flip normals if the average normal differs too much from the last frame
+                if(dot_product < 0.5):
+                    sign = -1
+                    averageNormal = np.multiply(averageNormal, -1)
 
-                #Indices
-                IndiceBytes = np.frombuffer(faces.tobytes(), dtype=np.uint8)
-                IndiceBytes = np.reshape(IndiceBytes, (-1, 12)) # Convert to 2D array with 3 indices per line
+            lastAverageNormal = averageNormal
 
-                #For the vertices, we need to add one byte per line which indicates how much indices per face exist
-                #We always have 3 indices, so we add a byte with value 3 to each indice row
-                threes = np.full((len(faces), 1), 3, dtype= np.uint8)
-                IndiceBytes = np.concatenate((threes, IndiceBytes), axis = 1)
-                IndiceBytes = IndiceBytes.ravel()
+            if(self.convertSettings.invertNormals):
+                sign *= -1
 
-                body = np.concatenate((byteCombination), axis = 1)
-                body = body.ravel()
+            if(sign != self.normalSigns[listIndex]):
+                self.flip_model_normals(listIndex)
+                self.normalSigns[listIndex] = sign
 
-                body = np.concatenate((body, IndiceBytes), axis = 0)
+                if(self.conversionCache is not None):
+                    outputfile = self.get_model_output_path(self.convertSettings.modelPaths[listIndex])
+                    self.conversionCache.update_entry("model", self.convertSettings.modelPaths[listIndex], {"normalSign" : sign, "outputs" : {os.path.basename(outputfile) : os.path.getsize(outputfile)}})
 
-            f.write(bytes(body))
+    def flip_model_normals(self, listIndex):
 
-        self.convertSettings.metaData.set_metadata_Model(vertexCount, indiceCount, headerSize, geoType, self.convertSettings.hasUVs, self.convertSettings.hasNormals, self.convertSettings.useCompression, listIndex)
+        metaData = self.convertSettings.metaData
+        outputfile = self.get_model_output_path(self.convertSettings.modelPaths[listIndex])
+        headerSize = metaData.headerSizes[listIndex]
+        vertexCount = metaData.verticeCounts[listIndex]
 
-        self.processFinishedCB(False, "")
+        if(self.uses_frame_compression()):
+            # Compressed frames need to be decompressed and compressed again
+            codec = self.get_frame_codec()
+            with open(outputfile, 'rb') as f:
+                content = f.read()
 
-        if self.debugMode:
-            print("Processed file: " + str(listIndex))
+            body = Sequence_Compression.decompress_frame(content[headerSize:], codec)
+            self.negate_normals(np.frombuffer(body, dtype=self.get_vertex_dtype(True), count=vertexCount))
 
-    def process_images(self):
+            with open(outputfile, 'wb') as f:
+                f.write(content[:headerSize])
+                for data in Sequence_Compression.compress_frame([body], codec, self.convertSettings.frameChunkSize):
+                    f.write(data)
+
+        else:
+            vertexData = np.memmap(outputfile, dtype=self.get_vertex_dtype(True), mode='r+', offset=headerSize, shape=(vertexCount,))
+            self.negate_normals(vertexData)
+            vertexData.flush()
+            del vertexData
+
+    def negate_normals(self, vertexData):
+
+        if(self.uses_octahedral_normals()):
+            encoding = self.convertSettings.normalEncoding
+            vertexData["normal"] = Sequence_Quantization.encode_octahedral(-Sequence_Quantization.decode_octahedral(vertexData["normal"], encoding), encoding)
+        else:
+            vertexData["normal"] *= -1
+
+    def get_topology_hash(self, vertexCount, faces):
+        faces = np.ascontiguousarray(faces, dtype=np.uint32)
+        return hashlib.sha1(np.uint32(vertexCount).tobytes() + faces.tobytes()).hexdigest()
+
+    def encode_temporal_deltas(self):
+
+        #Only sequences in which all frames share the same vertex count and faces can be delta encoded.
+        #The frames are split into groups, starting with a keyframe. All other frames of a group are stored
+        #as the difference to their keyframe, so a player needs at most two frames to restore any frame.
+        #Only the first frame keeps the index buffer, the other frames contain no faces
+        hashes = self.topologyHashes
+        if(self.convertSettings.isPointcloud or len(hashes) < 2 or None in hashes or len(set(hashes)) > 1):
+            return
+
+        interval = max(1, self.convertSettings.keyframeInterval)
+        groups = [list(range(i, min(i + interval, len(hashes)))) for i in range(0, len(hashes), interval)]
 
-        if(len(self.convertSettings.imagePaths) < self.convertSettings.maxThreads):
-            threads = len(self.convertSettings.imagePaths)
+        #The groups don't depend on each other, so they can be encoded in parallel
+        pool = ThreadPool(processes = max(1, min(self.convertSettings.maxThreads, len(groups))))
+        try:
+            pool.map(self.encode_delta_group, groups)
+        except (OSError, ValueError) as e:
+            self.processFinishedCB(True, "Error writing the delta encoded frames: " + str(e))
+            return
+        finally:
+            pool.close()
+            pool.join()
+
+        self.convertSettings.metaData.set_metadata_keyframes(interval)
+
+    def encode_delta_group(self, frames):
+
+        keyframeIndex = frames[0]
+        keyframeData = self.read_frame_vertices(keyframeIndex)
+
+        if(keyframeIndex > 0):
+            self.write_delta_frame(keyframeIndex, keyframeData, "keyframe")
+
+        for listIndex in frames[1:]:
+            vertexData = self.read_frame_vertices(listIndex)
+
+            #Integer attributes wrap around, so adding the delta to the keyframe restores them exactly
+            deltaData = np.empty_like(vertexData)
+            for name in vertexData.dtype.names:
+                deltaData[name] = vertexData[name] - keyframeData[name]
+
+            self.write_delta_frame(listIndex, deltaData, "delta " + str(keyframeIndex))
+
+    def read_frame_vertices(self, listIndex):
+
+        metaData = self.convertSettings.metaData
+        outputfile = self.get_model_output_path(self.convertSettings.modelPaths[listIndex])
+        headerSize = metaData.headerSizes[listIndex]
+
+        with open(outputfile, 'rb') as f:
+            content = f.read()
+
+        body = content[headerSize:]
+        if(self.uses_frame_compression()):
+            body = Sequence_Compression.decompress_frame(body, self.get_frame_codec())
+
+        return np.frombuffer(body, dtype=self.get_vertex_dtype(metaData.hasNormals), count=metaData.verticeCounts[listIndex])
+
+    def write_delta_frame(self, listIndex, vertexData, comment):
+
+        metaData = self.convertSettings.metaData
+        outputfile = self.get_model_output_path(self.convertSettings.modelPaths[listIndex])
+
+        header = self.create_model_header(len(vertexData), 0, comment)
+        packedData = [header, vertexData.view(np.uint8)]
+        if(self.uses_frame_compression()):
+            packedData = [header] + Sequence_Compression.compress_frame(packedData[1:], self.get_frame_codec(), self.convertSettings.frameChunkSize)
+
+        with open(outputfile, 'wb') as f:
+            for data in packedData:
+                f.write(data)
+
+        #Each group only changes its own frames, so the metadata lists can be updated directly
+        metaData.headerSizes[listIndex] = len(header)
+        metaData.indiceCounts[listIndex] = 0
+
+    def uses_frame_compression(self):
+        return len(self.convertSettings.frameCompression) > 0
+
+    def get_frame_codec(self):
+        # Created on first use, so that it is also available in the worker processes
+        if(self.frameCodec is None):
+            self.frameCodec = Sequence_Compression.create_codec(self.convertSettings.frameCompression)
+        return self.frameCodec
+
+    def uses_octahedral_normals(self):
+        return self.convertSettings.normalEncoding != "float"
+
+    def uses_quantized_positions(self):
+        # Positions can only be quantized when the bounds of the whole sequence are known
+        return self.convertSettings.useCompression and self.convertSettings.positionEncoding != "half"
+
+    def get_vertex_dtype(self, hasNormals):
+
+        #The vertex layout of the exported .ply files, depending on the sequence attributes
+        floatType = "<f2" if self.convertSettings.useCompression else "<f4"
+
+        if(self.uses_quantized_positions()):
+            fields = [Sequence_Quantization.get_position_field(self.convertSettings.positionEncoding)]
         else:
-            threads = self.convertSettings.maxThreads
+            fields = [("position", floatType, (3,))]
+
+        if(hasNormals and self.uses_octahedral_normals()):
+            fields.append(("normal", Sequence_Quantization.get_octahedral_type(self.convertSettings.normalEncoding), (2,)))
+        elif(hasNormals):
+            fields.append(("normal", floatType, (3,)))
+
+        if(self.convertSettings.isPointcloud == True):
+            fields.append(("color", np.uint8, (3,) if self.convertSettings.useCompression else (4,)))
+        elif(self.convertSettings.hasUVs == True):
+            fields.append(("uv", floatType, (2,)))
+
+        return np.dtype(fields)
+
+    def process_images(self):
+
+        imageCount = len(self.convertSettings.imagePaths)
+
+        encoderError = ""
+
+        if(self.convertSettings.convertToDDS):
+            self.ddsEncoder = Sequence_Texture_Encoder.create_encoder(Sequence_Texture_Encoder.ddsEncoders, self.convertSettings.ddsEncoder, self.convertSettings.resourcePath)
+            if(self.ddsEncoder is None):
+                encoderError = "Could not find the DDS texture encoder: " + self.convertSettings.ddsEncoder
+        if(self.convertSettings.convertToASTC):
+            self.astcEncoder = Sequence_Texture_Encoder.create_encoder(Sequence_Texture_Encoder.astcEncoders, self.convertSettings.astcEncoder, self.convertSettings.resourcePath)
+            if(self.astcEncoder is None):
+                encoderError = "Could not find the ASTC texture encoder: " + self.convertSettings.astcEncoder
+
+        if(len(encoderError) > 0):
+            for i in range(imageCount):
+                self.processFinishedCB(True, encoderError)
+            return
+
+        threads = max(1, min(imageCount, self.textureThreads))
+
+        #Validate all images up front from their headers, so that no time is spent encoding a sequence which can't be used
+        self.imageInfos = Sequence_Image_Probe.probe_images([os.path.join(self.convertSettings.inputPath, file) for file in self.convertSettings.imagePaths])
 
-        self.convertSettings.texturePool = ThreadPool(processes= threads)
+        tasks = []
+        for listIndex, file in enumerate(self.convertSettings.imagePaths):
+            errorText = Sequence_Image_Probe.get_validation_error(self.imageInfos[listIndex], self.imageInfos[0])
+            if(len(errorText) > 0):
+                self.processFinishedCB(True, errorText + " Frame " + str(listIndex))
+            else:
+                tasks.append((listIndex, file))
+
+        # If the first image is invalid, all images are
+        if(len(tasks) == 0):
+            return
+
+        self.texturePool = ThreadPool(processes= threads)
 
         #Read the first image to get the dimensions
-        self.convert_image(self.convertSettings.imagePaths[0])
-        self.convertSettings.imagePaths.pop(0)
+        self.convert_image_batch(tasks[:1])
+
+        # Split the remaining images evenly over all threads, but don't let a single batch get too large
+        remainingTasks = tasks[1:]
+        batchSize = min(self.convertSettings.textureBatchSize, max(1, math.ceil(len(remainingTasks) / threads)))
+        batches = [remainingTasks[i:i + batchSize] for i in range(0, len(remainingTasks), batchSize)]
 
-        self.convertSettings.texturePool.map_async(self.convert_image, self.convertSettings.imagePaths)
+        self.texturePool.map_async(self.convert_image_batch, batches)
 
-    def convert_image(self, file):
+    def convert_image_batch(self, tasks):
 
         if(self.terminateProcessing):
-            self.processFinishedCB(False, "")
+            for task in tasks:
+                self.processFinishedCB(False, "")
             return
 
-        listIndex = self.convertSettings.imagePaths.index(file)
+        jobs = [self.create_image_job(listIndex, file) for listIndex, file in tasks]
+        encodeJobs = [job for job in jobs if job.encode]
+
+        encodeErrors = {"dds" : "", "astc" : ""}
+        if(len(encodeJobs) > 0):
+            batchTimes = {}
+            startTime = time.perf_counter()
+            self.encode_texture_batch([job.inputfile for job in encodeJobs], [job.outputfileDDS for job in encodeJobs], [job.outputfileASTC for job in encodeJobs], encodeErrors)
+            startTime = Sequence_Instrumentation.add_stage_time(batchTimes, "encode", startTime)
+            if(self.convertSettings.textureLevels > 1 and len(encodeErrors["dds"]) == 0 and len(encodeErrors["astc"]) == 0):
+                self.encode_texture_levels(encodeJobs, encodeErrors)
+                Sequence_Instrumentation.add_stage_time(batchTimes, "levels", startTime)
+
+            # The encoders work on the whole batch, so each image gets an even share of the time
+            for job in encodeJobs:
+                for stage, stageTime in batchTimes.items():
+                    job.stageTimes[stage] = stageTime / len(encodeJobs)
+
+        for job in jobs:
+            if(job.encode and len(encodeErrors["dds"]) > 0):
+                self.processFinishedCB(True, encodeErrors["dds"])
+            elif(job.encode and len(encodeErrors["astc"]) > 0):
+                self.processFinishedCB(True, encodeErrors["astc"])
+            else:
+                self.finish_image(job)
+
+    def encode_texture_batch(self, inputfiles, outputfilesDDS, outputfilesASTC, encodeErrors):
+
+        # The DDS and ASTC encoders run at the same time, each on the whole batch
+        astcThread = None
+        if(self.astcEncoder is not None):
+            astcThread = Thread(target=self.encode_textures, args=(self.astcEncoder, inputfiles, outputfilesASTC, encodeErrors, "astc"))
+            astcThread.start()
+        if(self.ddsEncoder is not None):
+            self.encode_textures(self.ddsEncoder, inputfiles, outputfilesDDS, encodeErrors, "dds")
+        if(astcThread is not None):
+            astcThread.join()
+
+    def encode_textures(self, encoder, inputfiles, outputfiles, encodeErrors, textureType):
+        encodeErrors[textureType] = encoder.encode(inputfiles, outputfiles, self.convertSettings.convertToSRGB)
+
+    def encode_texture_levels(self, jobs, encodeErrors):
+
+        # The source images are downscaled once into temporary images for all levels,
+        # which are then encoded level by level, just like the full resolution textures
+        levelCount = self.convertSettings.textureLevels
+        scaledfiles = [[] for level in range(levelCount)]
+
+        for job in jobs:
+            levelfiles = [None]
+            for level in range(1, levelCount):
+                outputfileDDS = self.get_texture_level_paths(job.file, level)[0]
+                os.makedirs(os.path.dirname(outputfileDDS), exist_ok=True)
+                levelfiles.append(os.path.splitext(outputfileDDS)[0] + ".png")
+
+            errorText = Sequence_Texture_Encoder.write_scaled_images(job.inputfile, levelfiles[1:])
+            if(len(errorText) > 0):
+                # The scaled images are shared by both formats, so the error belongs to the first format that is encoded
+                encodeErrors["dds" if self.ddsEncoder is not None else "astc"] = errorText
+                return
+
+            for level in range(1, levelCount):
+                scaledfiles[level].append(levelfiles[level])
+
+        for level in range(1, levelCount):
+            levelPaths = [self.get_texture_level_paths(job.file, level) for job in jobs]
+            self.encode_texture_batch(scaledfiles[level], [paths[0] for paths in levelPaths], [paths[1] for paths in levelPaths], encodeErrors)
+
+            for scaledfile in scaledfiles[level]:
+                os.remove(scaledfile)
+
+            if(len(encodeErrors["dds"]) > 0 or len(encodeErrors["astc"]) > 0):
+                return
+
+    def get_texture_level_folder(self, level):
+        return "mip" + str(level)
+
+    def get_texture_level_paths(self, file, level):
+
+        # The lower resolution levels have the same file names as the textures, inside of a mip<n> subfolder
+        outputfileDDS, outputfileASTC = self.get_image_output_paths(file)
+        if(level == 0):
+            return outputfileDDS, outputfileASTC
+
+        folder = os.path.join(self.convertSettings.outputPath, self.get_texture_level_folder(level))
+        return os.path.join(folder, os.path.basename(outputfileDDS)), os.path.join(folder, os.path.basename(outputfileASTC))
+
+    def get_image_output_paths(self, file):
 
         splitted_file = file.split(".")
         file_name = splitted_file[0]
         for x in range(1, len(splitted_file) - 1):
             file_name += "." + splitted_file[x]
-        inputfile = os.path.join(self.convertSettings.inputPath, file)
 
-        sizeDDS = 0
-        sizeASTC = 0
+        return os.path.join(self.convertSettings.outputPath, file_name + ".dds"), os.path.join(self.convertSettings.outputPath, file_name + ".astc")
+
+    def create_image_job(self, listIndex, file):
+
+        job = ImageJob()
+        job.listIndex = listIndex
+        job.file = file
+        job.stageTimes = {}
+        job.inputfile = os.path.join(self.convertSettings.inputPath, file)
+        job.outputfileDDS, job.outputfileASTC = self.get_image_output_paths(file)
+
+        if(listIndex < len(self.imageInfos)):
+            job.dimensions = [self.imageInfos[listIndex].width, self.imageInfos[listIndex].height]
+
+        if(self.conversionCache is not None):
+            source = self.conversionCache.get_source_info(job.inputfile, file)
+            settings = [self.convertSettings.convertToDDS, self.convertSettings.convertToASTC, self.convertSettings.convertToSRGB, self.get_encoder_names()]
+            if(self.convertSettings.textureLevels > 1):
+                settings.append(["textureLevels", self.convertSettings.textureLevels])
+            settingsKey = json.dumps(settings)
+            entry = self.conversionCache.get_entry("image", file, source, settingsKey)
+            if(entry is not None and self.are_outputs_valid(entry)):
+                job.dimensions = entry["dimensions"]
+                job.encode = False
+            else:
+                job.cacheEntry = {"type" : "image", "file" : file, "source" : source, "settings" : settingsKey}
 
-        if(self.convertSettings.convertToDDS):
-            outputfileDDS = os.path.join(self.convertSettings.outputPath, file_name + ".dds")
-            cmd = self.convertSettings.resourcePath + "texconv " + "\"" + inputfile + "\"" + " -o " + "\"" + self.convertSettings.outputPath + "\"" +" -m 1 -f DXT1 -y -nologo"
-            if(self.convertSettings.convertToSRGB):
-                cmd += " -srgbo"
-            if(subprocess.run(cmd, stdout=open(os.devnull, 'wb')).returncode != 0):
-                self.processFinishedCB(True, "Error converting DDS texture: " + inputfile)
-                return
+        return job
 
-        if(self.convertSettings.convertToASTC):
-            outputfileASCT = os.path.join(self.convertSettings.outputPath, file_name + ".astc")
-            cmd = self.convertSettings.resourcePath + "astcenc -cl " + "\"" + inputfile + "\"" + " " + "\"" + outputfileASCT + "\"" + " 6x6 -medium -silent"
-            if(subprocess.run(cmd, stdout=open(os.devnull, 'wb')).returncode != 0):
-                self.processFinishedCB(True, "Error converting ASTC texture: " + inputfile)
-                return
+    def get_encoder_names(self):
+        return [encoder.name if encoder is not None else None for encoder in [self.ddsEncoder, self.astcEncoder]]
+
+    def finish_image(self, job):
+
+        sizeDDS = 0
+        sizeASTC = 0
+        dimensions = job.dimensions
 
         # Write the metadata once per sequence
-        if(listIndex == 0):
+        if(job.listIndex == 0):
             if(self.convertSettings.convertToDDS):
-                sizeDDS = os.path.getsize(outputfileDDS) - 128 #128 = DDS header size
+                sizeDDS = os.path.getsize(job.outputfileDDS) - 128 #128 = DDS header size
             if(self.convertSettings.convertToASTC):
-                sizeASTC = os.path.getsize(outputfileASCT) - 16 #20 = ASTC header size
+                sizeASTC = os.path.getsize(job.outputfileASTC) - 16 #20 = ASTC header size
 
             if(len(self.convertSettings.imagePaths) == 1):
                 textureMode = Sequence_Metadata.TextureMode.single
             if(len(self.convertSettings.imagePaths) > 1):
                 textureMode = Sequence_Metadata.TextureMode.perFrame
 
-            self.convertSettings.textureDimensions = self.get_image_dimensions(inputfile)
+            if(dimensions is None):
+                dimensions = self.get_image_dimensions(job.inputfile)
+            self.convertSettings.textureDimensions = dimensions
             self.convertSettings.metaData.set_metadata_texture(self.convertSettings.convertToDDS, self.convertSettings.convertToASTC, self.convertSettings.textureDimensions[0], self.convertSettings.textureDimensions[1], sizeDDS, sizeASTC, textureMode)
+
+            if(self.convertSettings.textureLevels > 1):
+                self.set_texture_level_metadata(job, dimensions, sizeDDS, sizeASTC)
         else:
-            dimensions = self.get_image_dimensions(inputfile)
+            if(dimensions is None):
+                dimensions = self.get_image_dimensions(job.inputfile)
             if len(dimensions) < 2:
                 self.processFinishedCB(True, "Could not get image dimensions!")
                 return
             if(dimensions[0] != self.convertSettings.textureDimensions[0] or dimensions[1] != self.convertSettings.textureDimensions[1]):
-                self.processFinishedCB(True, "All textures need to have the same resolution! Frame " + str(listIndex))
+                self.processFinishedCB(True, "All textures need to have the same resolution! Frame " + str(job.listIndex))
                 return
 
+        if(job.cacheEntry is not None):
+            job.cacheEntry["dimensions"] = dimensions
+            job.cacheEntry["outputs"] = {}
+            if(self.convertSettings.convertToDDS):
+                job.cacheEntry["outputs"][os.path.basename(job.outputfileDDS)] = os.path.getsize(job.outputfileDDS)
+            if(self.convertSettings.convertToASTC):
+                job.cacheEntry["outputs"][os.path.basename(job.outputfileASTC)] = os.path.getsize(job.outputfileASTC)
+            for level in range(1, self.convertSettings.textureLevels):
+                for outputfile, convert in zip(self.get_texture_level_paths(job.file, level), [self.convertSettings.convertToDDS, self.convertSettings.convertToASTC]):
+                    if(convert):
+                        job.cacheEntry["outputs"][os.path.relpath(outputfile, self.convertSettings.outputPath)] = os.path.getsize(outputfile)
+            self.conversionCache.add_entry(job.cacheEntry)
+
+        if(self.conversionStats is not None):
+            self.add_image_stats(job)
+
         #print("Converted image file: " + file_name)
         #print()
         self.processFinishedCB(False, "")
 
-    def get_image_dimensions(self, filePath):
+    def add_image_stats(self, job):
 
-            pilimg = Image.open(filePath)
-            pilimg.load()
-            dimensions = [pilimg.width, pilimg.height]
-            pilimg.close()
-            return dimensions
+        bytesRead = 0
+        bytesWritten = 0
+        if(job.encode):
+            bytesRead = os.path.getsize(job.inputfile)
+            for level in range(self.convertSettings.textureLevels):
+                for outputfile, convert in zip(self.get_texture_level_paths(job.file, level), [self.convertSettings.convertToDDS, self.convertSettings.convertToASTC]):
+                    if(convert):
+                        bytesWritten += os.path.getsize(outputfile)
 
-    def get_image_gamme_encoded(self, filePath):
+        self.conversionStats.add_frame("image", job.listIndex, job.file, job.stageTimes, bytesRead, bytesWritten, not job.encode)
+
+    def set_texture_level_metadata(self, job, dimensions, sizeDDS, sizeASTC):
 
-        gammaencoded = False
+        # The sizes of the first frame, as all frames have the same resolution
+        widths = []
+        heights = []
+        sizesDDS = [sizeDDS]
+        sizesASTC = [sizeASTC]
 
-        pilimg = Image.open(filePath)
-        pilimg.load()
+        for level in range(self.convertSettings.textureLevels):
+            levelDimensions = Sequence_Texture_Encoder.get_level_dimensions(dimensions[0], dimensions[1], level)
+            widths.append(levelDimensions[0])
+            heights.append(levelDimensions[1])
 
-        if("gamma" in pilimg.info):
-            gamma = pilimg.info["gamma"]
-            if(gamma >= 0.45 and gamma <= 0.46):
-                gammaencoded = True
+            if(level > 0):
+                outputfileDDS, outputfileASTC = self.get_texture_level_paths(job.file, level)
+                sizesDDS.append(os.path.getsize(outputfileDDS) - 128 if self.convertSettings.convertToDDS else 0)
+                sizesASTC.append(os.path.getsize(outputfileASTC) - 16 if self.convertSettings.convertToASTC else 0)
 
-        pilimg.close()
-        return gammaencoded
+        self.convertSettings.metaData.set_metadata_texture_levels(widths, heights, sizesDDS, sizesASTC)
+
+    def get_image_dimensions(self, filePath):
+
+        # Only reads the header of the image
+        info = Sequence_Image_Probe.probe_image(filePath)
+        if(len(info.errorText) > 0):
+            return []
+        return [info.width, info.height]
+
+    def get_image_gamme_encoded(self, filePath):
+        return Sequence_Image_Probe.is_gamma_encoded(Sequence_Image_Probe.probe_image(filePath))
 
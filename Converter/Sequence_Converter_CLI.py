@@ -0,0 +1,343 @@
+import os
+import sys
+import re
+import argparse
+import multiprocessing
+if getattr(sys, 'frozen', False):
+    multiprocessing.freeze_support()  # for PyInstaller support
+from threading import Lock
+from Sequence_Converter import SequenceConverter
+from Sequence_Converter import SequenceConverterSettings
+from Sequence_Metadata import MetaData
+import Sequence_Texture_Encoder
+import Sequence_Quantization
+import Sequence_Compression
+import Sequence_Ordering
+
+# Headless entry point for the converter. Can be used from the command line:
+#   python Sequence_Converter_CLI.py <inputDir> [-o <outputDir>] [options]
+# or as a library, without pulling in DearPyGUI or Tkinter:
+#   settings = create_conversion_settings(inputDir, outputDir)
+#   success, errorText = convert_sequence(settings)
+
+validModelTypes = ["obj", "3ds", "fbx", "glb", "gltf", "obj", "ply", "ptx", "stl", "xyz", "pts"]
+validImageTypes = ["jpg", "jpeg", "png", "bmp", "tga"]
+invalidImageTypes = ["dds", "atsc"]
+
+def tryint(s):
+    try:
+        return int(s)
+    except ValueError:
+        return s
+
+def alphanum_key(s):
+    return [ tryint(c) for c in re.split('([0-9]+)', s) ]
+
+def human_sort(l):
+    l.sort(key=alphanum_key)
+
+def get_default_resource_path():
+    if getattr(sys, 'frozen', False):
+        applicationPath = os.path.abspath(os.path.dirname(sys.executable))
+    else:
+        applicationPath = os.path.abspath(os.path.dirname(__file__))
+
+    return os.path.join(applicationPath, "resources") + os.sep
+
+def find_sequence_files(inputPath):
+
+    # Returns the sorted model and image files of a sequence folder, as well as an error text (empty on success)
+    modelPaths = []
+    imagePaths = []
+
+    if(os.path.exists(inputPath) == False):
+        return modelPaths, imagePaths, "Folder does not exist!"
+
+    for file in os.listdir(inputPath):
+        splitted_path = file.split(".")
+        file_ending = splitted_path[len(splitted_path) - 1]
+
+        if(file_ending in validModelTypes):
+            modelPaths.append(file)
+
+        elif(file_ending in validImageTypes):
+            imagePaths.append(file)
+
+        elif(file_ending in invalidImageTypes):
+            return modelPaths, imagePaths, "Can't convert already compressed (.dds, .astc) images! Please supply the images as .jpg, .png, .bmp or .tga!"
+
+    if(len(modelPaths) < 1 and len(imagePaths) < 1):
+        return modelPaths, imagePaths, "No model/image files found in folder!"
+
+    human_sort(modelPaths)
+    human_sort(imagePaths)
+
+    # Check if the files are already compressed
+    if(len(modelPaths) > 0):
+        with open(os.path.join(inputPath, modelPaths[0]), 'rb') as f:
+            text = f.read(200).decode('ascii', errors='ignore')
+            if("half") in text:
+                return modelPaths, imagePaths, "Sequence is already compressed! Please use the original sequence for conversion."
+
+    return modelPaths, imagePaths, ""
+
+def create_conversion_settings(inputPath, outputPath = None):
+
+    # Creates settings with the same defaults as the converter UI. Returns None and an error text if the input folder is invalid.
+    # The folders are made absolute, as pymeshlab changes the working directory while it loads some formats (e.g. .obj).
+    # The model and image paths are file names inside of the input folder, so they are resolved against the absolute folder
+    inputPath = os.path.abspath(inputPath)
+    modelPaths, imagePaths, errorText = find_sequence_files(inputPath)
+    if(len(errorText) > 0):
+        return None, errorText
+
+    if(outputPath is None or len(outputPath) < 1):
+        outputPath = os.path.join(inputPath, "converted")
+    outputPath = os.path.abspath(outputPath)
+
+    convertSettings = SequenceConverterSettings()
+    convertSettings.metaData = MetaData()
+    convertSettings.modelPaths = modelPaths
+    convertSettings.imagePaths = imagePaths
+    convertSettings.inputPath = inputPath
+    convertSettings.outputPath = outputPath
+    convertSettings.resourcePath = get_default_resource_path()
+    convertSettings.textureDimensions = []
+    convertSettings.convertToDDS = True
+    convertSettings.convertToASTC = True
+
+    if(len(imagePaths) > 1):
+        convertSettings.convertToSRGB = SequenceConverter().get_image_gamme_encoded(os.path.join(inputPath, imagePaths[0]))
+
+    return convertSettings, ""
+
+def convert_sequence(convertSettings, progressCB = None, stageCounters = None, statsCB = None, conversionSummary = None):
+
+    # Runs preprocessing and conversion to completion and blocks until all files are written.
+    # progressCB(processedFileCount, totalFileCount) is optional and called from the worker threads.
+    # If a dict is given as stageCounters, it is filled with the throughput counters of the model conversion stages.
+    # statsCB(record) is optional and receives the statistics of every converted frame and pass, see Sequence_Instrumentation.
+    # If a dict is given as conversionSummary, it is filled with the total time of each stage, bytes and vertex counts.
+    # Returns True and an empty string on success, otherwise False and the first error that occurred
+
+    if not (os.path.exists(convertSettings.outputPath)):
+        os.makedirs(convertSettings.outputPath)
+
+    if not (convertSettings.convertToDDS or convertSettings.convertToASTC):
+        convertSettings.imagePaths = []
+
+    preprocessFileCount = len(convertSettings.modelPaths) if convertSettings.useCompression else 0
+    totalFileCount = preprocessFileCount + len(convertSettings.modelPaths) + len(convertSettings.imagePaths)
+
+    converter = SequenceConverter()
+    progressLock = Lock()
+    progress = {"processed" : 0, "errorText" : ""}
+
+    def file_finished_cb(error, errorText):
+        progressLock.acquire()
+        progress["processed"] += 1
+        if(error and len(progress["errorText"]) == 0):
+            progress["errorText"] = errorText
+            converter.terminate_conversion()
+        processed = progress["processed"]
+        progressLock.release()
+
+        if(progressCB is not None):
+            progressCB(processed, totalFileCount)
+
+    converter.set_conversion_settings(convertSettings, file_finished_cb, statsCB)
+
+    if(convertSettings.useCompression):
+        converter.start_preprocessing()
+        converter.finish_preprocessing()
+
+    if(len(progress["errorText"]) == 0):
+        if converter.start_conversion() == False:
+            return False, "Error: Could not start conversion process!"
+
+    failed = len(progress["errorText"]) > 0 or converter.terminateProcessing
+    converter.finish_conversion(not failed)
+
+    if(stageCounters is not None):
+        stageCounters.update(converter.get_pipeline_counters())
+
+    if(conversionSummary is not None):
+        conversionSummary.update(converter.get_conversion_summary())
+
+    # Errors can also occur while the pools are finishing
+    if(len(progress["errorText"]) > 0):
+        return False, progress["errorText"]
+
+    return True, ""
+
+def print_progress_cb(processedFileCount, totalFileCount):
+    print("Progress: {processed}/{total}".format(processed = processedFileCount, total = totalFileCount), end="\r", flush=True)
+
+def print_stage_counters(stageCounters):
+    for name, counters in stageCounters.items():
+        print("{name}: {items} files, {threads} threads, {rate:.1f} files/s, {mbs:.1f} MB/s, busy {busy:.2f}s, waiting {wait:.2f}s".format(
+            name = name, items = counters["items"], threads = counters["threads"], rate = counters["itemsPerSecond"],
+            mbs = counters["bytesPerSecond"] / (1024 * 1024), busy = counters["busyTime"], wait = counters["waitTime"]))
+
+def print_conversion_summary(summary):
+
+    # The stages which took the longest first
+    for frameType, stageTimes in summary["stages"].items():
+        if(summary["frames"][frameType] == 0):
+            continue
+        print("{type}s: {frames} files ({cached} cached)".format(type = frameType, frames = summary["frames"][frameType], cached = summary["cachedFrames"][frameType]))
+        for stage, stageTime in sorted(stageTimes.items(), key = lambda item: item[1], reverse = True):
+            print("  {stage}: {time:.2f}s".format(stage = stage, time = stageTime))
+
+    for name, passTime in summary["passes"].items():
+        print("{name} pass: {time:.2f}s".format(name = name, time = passTime))
+
+    print("Read {read:.1f} MB, wrote {written:.1f} MB, {vertices} vertices in {time:.2f}s".format(
+        read = summary["bytesRead"] / (1024 * 1024), written = summary["bytesWritten"] / (1024 * 1024), vertices = summary["vertexCount"], time = summary["elapsedTime"]))
+
+    if(len(summary["maxQueueDepths"]) > 0):
+        print("Max queue depths: " + ", ".join(name + " " + str(depth) for name, depth in summary["maxQueueDepths"].items()))
+
+def percentage_list(text):
+
+    # Parses a comma separated list of percentages, e.g. "50,25,12.5"
+    try:
+        values = [float(x) for x in text.split(",") if len(x.strip()) > 0]
+    except ValueError:
+        raise argparse.ArgumentTypeError("Not a list of percentages: " + text)
+
+    for value in values:
+        if(value <= 0 or value > 100):
+            raise argparse.ArgumentTypeError("Percentages need to be between 0 and 100: " + text)
+
+    return [int(value) if value.is_integer() else value for value in values]
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description="Converts a folder of meshes, pointclouds and images into a sequence for the Geometry Sequence Player")
+    parser.add_argument("input", help="Folder containing the sequence files")
+    parser.add_argument("-o", "--output", default=None, help="Output folder. Defaults to a folder named 'converted' inside the input folder")
+    parser.add_argument("-t", "--threads", type=int, default=8, help="Maximum amount of threads used for the conversion")
+    parser.add_argument("-p", "--processes", action="store_true", help="Convert the models in worker processes instead of threads, which scales better on many cores")
+    parser.add_argument("--memory-budget", type=int, default=0, metavar="MB", help="Only convert as many models at the same time as fit into the given memory, based on an estimate from their file and vertex counts. 0 for no limit")
+    parser.add_argument("--resources", default=None, help="Folder containing the texconv and astcenc executables")
+    parser.add_argument("-i", "--incremental", action="store_true", help="Only convert files that changed since the last conversion into the same output folder")
+    parser.add_argument("--container", action="store_true", help="Pack all frames into a single container file instead of one file per frame")
+    parser.add_argument("--container-textures", action="store_true", help="Also pack the textures into the container")
+    parser.add_argument("--binary-frame-data", action="store_true", help="Write the per-frame header sizes and counts into a binary file instead of the sequence.json")
+    parser.add_argument("--compression", action="store_true", help="Compress the sequence to around half its size")
+    parser.add_argument("--position-encoding", default="half", choices=Sequence_Quantization.positionEncodings, help="How the positions of compressed sequences are stored. 'packed' uses 10/11/11 bits in 4 bytes")
+    parser.add_argument("--position-bits", type=int, default=16, choices=range(2, 17), metavar="[2-16]", help="Bit depth of the unorm/snorm position encodings")
+    parser.add_argument("--frame-compression", default="", choices=[""] + list(Sequence_Compression.frameCodecs), help="Losslessly compress the frame bodies with the given codec. zstd and lz4 need the zstandard/lz4 packages")
+    parser.add_argument("--frame-chunk-size", type=int, default=Sequence_Compression.defaultChunkSize, help="Uncompressed size of the independently compressed chunks, in bytes")
+    parser.add_argument("--temporal-deltas", action="store_true", help="Store the frames of meshes with constant topology as deltas to a keyframe")
+    parser.add_argument("--keyframe-interval", type=int, default=30, help="Frames between two keyframes of the temporal delta encoding")
+    parser.add_argument("--mesh-lods", type=percentage_list, default=[], metavar="PERCENTAGES", help="Comma separated face percentages of simplified mesh levels of detail, e.g. 50,25. They are written into lod1, lod2, ... subfolders")
+    parser.add_argument("--optimize-meshes", action="store_true", help="Reorder the faces and vertices of meshes for faster rendering")
+    parser.add_argument("--save-normals", action="store_true", help="Export the normals of the meshes/pointclouds")
+    parser.add_argument("--normal-encoding", default="float", choices=Sequence_Quantization.normalEncodings, help="How normals are stored. oct8/oct16 use 2/4 bytes per normal")
+    parser.add_argument("--decimate", type=int, default=None, metavar="PERCENTAGE", help="Decimate pointclouds to the given percentage of points")
+    parser.add_argument("--decimate-mode", default="random", choices=Sequence_Ordering.decimationModes, help="How the points are selected when decimating. 'stride' and 'voxel' are deterministic and keep the points evenly distributed")
+    parser.add_argument("--sort-points", action="store_true", help="Store the points of pointclouds in spatial (Morton) order")
+    parser.add_argument("--point-lods", type=percentage_list, default=[], metavar="PERCENTAGES", help="Comma separated point percentages of additional pointcloud levels of detail, e.g. 50,25,10. The points are ordered so that each level is a prefix of the frame")
+    parser.add_argument("--merge-distance", type=float, default=None, metavar="PERCENTAGE", help="Merge pointcloud points closer than the given distance, in percent of the bounding box diagonal")
+    parser.add_argument("--generate-normals", action="store_true", help="Estimate normals for pointclouds")
+    parser.add_argument("--invert-normals", action="store_true", help="Invert the estimated pointcloud normals")
+    parser.add_argument("--no-dds", action="store_true", help="Don't generate .dds textures")
+    parser.add_argument("--no-astc", action="store_true", help="Don't generate .astc textures")
+    parser.add_argument("--dds-encoder", default="auto", choices=["auto"] + list(Sequence_Texture_Encoder.ddsEncoders), help="Encoder used for the .dds textures. 'builtin' works without the bundled executables")
+    parser.add_argument("--astc-encoder", default="auto", choices=["auto"] + list(Sequence_Texture_Encoder.astcEncoders), help="Encoder used for the .astc textures. With 'auto', the .astc textures are skipped with a warning if no encoder is found")
+    parser.add_argument("--texture-array", action="store_true", help="Pack the per-frame textures into one texture array file per format")
+    parser.add_argument("--texture-levels", type=int, default=1, help="Resolutions of each texture. Every level halves the resolution of the previous one and is written into a mip1, mip2, ... subfolder")
+    parser.add_argument("--srgb", action="store_true", help="Convert the textures to the SRGB profile")
+    parser.add_argument("--stats", action="store_true", help="Print the throughput and the total time of each conversion stage")
+    parser.add_argument("--trace", default=None, metavar="FILE", help="Write the timings, sizes and queue depths of every frame into a JSON lines file")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Don't print the progress")
+    args = parser.parse_args(argv)
+
+    # The positions are only quantized for compressed sequences
+    if(args.position_encoding != "half" and not args.compression):
+        parser.error("--position-encoding " + args.position_encoding + " requires --compression")
+
+    convertSettings, errorText = create_conversion_settings(args.input, args.output)
+    if(convertSettings is None):
+        print(errorText, file=sys.stderr)
+        return 1
+
+    convertSettings.maxThreads = max(1, args.threads)
+    convertSettings.useProcessPool = args.processes
+    convertSettings.memoryBudget = max(0, args.memory_budget) * 1024 * 1024
+    convertSettings.incrementalConversion = args.incremental
+    if(args.resources is not None):
+        convertSettings.resourcePath = os.path.join(args.resources, "")
+    convertSettings.writeContainer = args.container or args.container_textures
+    convertSettings.containerTextures = args.container_textures
+    convertSettings.writeFrameData = args.binary_frame_data
+    convertSettings.useCompression = args.compression
+    if(len(args.frame_compression) > 0 and not Sequence_Compression.is_codec_available(args.frame_compression)):
+        print("The package for the " + args.frame_compression + " codec is not installed!", file=sys.stderr)
+        return 1
+    convertSettings.frameCompression = args.frame_compression
+    convertSettings.frameChunkSize = max(1, args.frame_chunk_size)
+    convertSettings.temporalDeltas = args.temporal_deltas
+    convertSettings.optimizeMeshes = args.optimize_meshes
+    convertSettings.meshLODs = args.mesh_lods
+    convertSettings.keyframeInterval = max(1, args.keyframe_interval)
+    convertSettings.positionEncoding = args.position_encoding
+    convertSettings.positionBits = args.position_bits
+    convertSettings.saveNormals = args.save_normals or args.generate_normals
+    convertSettings.generateNormals = args.generate_normals
+    convertSettings.invertNormals = args.invert_normals
+    convertSettings.normalEncoding = args.normal_encoding
+    if(args.decimate is not None):
+        convertSettings.decimatePointcloud = True
+        convertSettings.decimatePercentage = args.decimate
+    convertSettings.decimationMode = args.decimate_mode
+    convertSettings.sortPoints = args.sort_points
+    convertSettings.pointcloudLODs = args.point_lods
+    if(args.merge_distance is not None):
+        convertSettings.mergePoints = True
+        convertSettings.mergeDistance = args.merge_distance
+    convertSettings.convertToDDS = not args.no_dds
+    convertSettings.convertToASTC = not args.no_astc
+    convertSettings.ddsEncoder = args.dds_encoder
+    convertSettings.astcEncoder = args.astc_encoder
+
+    # astcenc is only bundled for Windows. Unless it was requested explicitly, the .astc textures are skipped when it can't be found
+    if(convertSettings.convertToASTC and args.astc_encoder == "auto" and len(convertSettings.imagePaths) > 0):
+        if(Sequence_Texture_Encoder.create_encoder(Sequence_Texture_Encoder.astcEncoders, "auto", convertSettings.resourcePath) is None):
+            print("Warning: No ASTC texture encoder found, skipping the .astc textures. Install astcenc or use --no-astc to hide this warning", file=sys.stderr)
+            convertSettings.convertToASTC = False
+    convertSettings.writeTextureArrays = args.texture_array
+    convertSettings.textureLevels = max(1, args.texture_levels)
+    convertSettings.convertToSRGB = convertSettings.convertToSRGB or args.srgb
+
+    if(args.trace is not None):
+        try:
+            open(args.trace, 'w').close()
+        except OSError as e:
+            print("Could not write the trace file: " + str(e), file=sys.stderr)
+            return 1
+        convertSettings.traceFile = args.trace
+
+    stageCounters = {}
+    conversionSummary = {}
+    success, errorText = convert_sequence(convertSettings, None if args.quiet else print_progress_cb, stageCounters, None, conversionSummary)
+
+    if not args.quiet:
+        print()
+
+    if not success:
+        print(errorText, file=sys.stderr)
+        return 1
+
+    if args.stats:
+        print_stage_counters(stageCounters)
+        print_conversion_summary(conversionSummary)
+
+    if not args.quiet:
+        print("Finished! Sequence written to: " + convertSettings.outputPath)
+    return 0
+
+if (__name__ == '__main__'):
+    sys.exit(main())
@@ -1,6 +1,5 @@
 import os
 import sys
-import re
 import multiprocessing
 if getattr(sys, 'frozen', False):
     multiprocessing.freeze_support()  # for PyInstaller support
@@ -13,6 +12,7 @@ import dearpygui.dearpygui as dpg
 from Sequence_Converter import SequenceConverter
 from Sequence_Converter import SequenceConverterSettings
 from Sequence_Metadata import MetaData
+from Sequence_Converter_CLI import find_sequence_files
 
 class ConverterUI:
 
@@ -75,10 +75,6 @@ class ConverterUI:
     mergePoints = False
     mergeDistance = 0.001
 
-    validModelTypes = ["obj", "3ds", "fbx", "glb", "gltf", "obj", "ply", "ptx", "stl", "xyz", "pts"]
-    validImageTypes = ["jpg", "jpeg", "png", "bmp", "tga"]
-    invalidImageTypes = ["dds", "atsc"]
-
     converter = SequenceConverter()
     terminationSignal = Event()
     progressbarLock = Lock()
@@ -348,41 +344,17 @@ class ConverterUI:
 
     def validate_input_files(self, input_path):
 
-            if(os.path.exists(input_path) == False):
-                return "Folder does not exist!"
-
-            files = os.listdir(input_path)
-
-            #Sort the files into model and images
-            for file in files:
-                splitted_path = file.split(".")
-                file_ending = splitted_path[len(splitted_path) - 1]
-
-                if(file_ending in self.validModelTypes):
-                    self.modelPathList.append(file)
-
-                elif(file_ending in self.validImageTypes):
-                    self.imagePathList.append(file)
-
-                elif(file_ending in self.invalidImageTypes):
-                    return "Can't convert already compressed (.dds, .astc) images! Please supply the images as .jpg, .png, .bmp or .tga!"
+            modelPaths, imagePaths, errorText = find_sequence_files(input_path)
+            if(len(errorText) > 0):
+                return errorText
 
-            if(len(self.modelPathList) < 1 and len(self.imagePathList) < 1):
-                return "No model/image files found in folder!"
+            self.modelPathList.extend(modelPaths)
+            self.imagePathList.extend(imagePaths)
 
             if(len(self.imagePathList) > 1):
                 self.convertToSRGB = self.converter.get_image_gamme_encoded(os.path.join(input_path, self.imagePathList[0]))
                 self.set_SRGB_enabled(self.convertToSRGB)
 
-            self.human_sort(self.modelPathList)
-            self.human_sort(self.imagePathList)
-
-            # Check if the files are already compressed
-            modelPath = os.path.join(input_path, self.modelPathList[0])
-            with open(modelPath, 'rb') as f:
-                text = f.read(200).decode('ascii', errors='ignore')
-                if("half") in text:
-                    return "Sequence is already compressed! Please use the original sequence for conversion."
             return True
 
     def set_proposed_output_files(self, input_path):
@@ -456,19 +428,6 @@ class ConverterUI:
         with open(self.configPath, "w") as configfile:
                 self.config.write(configfile)
 
-    def tryint(self, s):
-        try:
-            return int(s)
-        except ValueError:
-            return s
-
-    def alphanum_key(self, s):
-        return [ self.tryint(c) for c in re.split('([0-9]+)', s) ]
-
-    def human_sort(self, l):
-        l.sort(key=self.alphanum_key)
-
-
     # --- Main UI ---
 
     def set_progressbar(self, progress):
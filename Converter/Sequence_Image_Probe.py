@@ -0,0 +1,86 @@
+import os
+from threading import Lock
+from multiprocessing.pool import ThreadPool
+from PIL import Image
+
+# Reads the attributes of images from their headers only. Pillow opens images lazily, so as long as load()
+# is never called, only the header is read and no pixels are decoded. The results are cached for the
+# lifetime of the process, so that e.g. the UI and the converter don't read the same headers twice
+
+probeThreads = 16 # Probing mostly waits on the disk, so more threads than cores are useful
+
+class ImageInfo:
+    width = 0
+    height = 0
+    format = ""
+    mode = ""
+    gamma = None # The value of the PNG gAMA chunk
+    srgb = False # True if the image has a PNG sRGB chunk
+    iccProfile = False
+    errorText = "" # Only set if the header could not be read
+
+probeCache = {}
+probeCacheLock = Lock()
+
+def probe_image(path):
+
+    # Returns the ImageInfo of the image. Changed files (size or modification time) are probed again
+    try:
+        stat = os.stat(path)
+        cacheKey = (path, stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        cacheKey = None
+
+    if(cacheKey is not None):
+        probeCacheLock.acquire()
+        info = probeCache.get(cacheKey)
+        probeCacheLock.release()
+        if(info is not None):
+            return info
+
+    info = ImageInfo()
+
+    try:
+        with Image.open(path) as pilimg:
+            info.width, info.height = pilimg.size
+            info.format = pilimg.format
+            info.mode = pilimg.mode
+            info.gamma = pilimg.info.get("gamma")
+            info.srgb = "srgb" in pilimg.info
+            info.iccProfile = "icc_profile" in pilimg.info
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        info.errorText = "Could not read image: " + path + " (" + str(e) + ")"
+        return info # Failed probes are not cached, the file might still be written
+
+    if(cacheKey is not None):
+        probeCacheLock.acquire()
+        probeCache[cacheKey] = info
+        probeCacheLock.release()
+
+    return info
+
+def probe_images(paths, threads = probeThreads):
+
+    # Probes all images in parallel. Returns the ImageInfos in the same order as the paths
+    if(len(paths) < 2 or threads < 2):
+        return [probe_image(path) for path in paths]
+
+    pool = ThreadPool(processes = min(threads, len(paths)))
+    infos = pool.map(probe_image, paths)
+    pool.close()
+    pool.join()
+    return infos
+
+def is_gamma_encoded(info):
+    return info.gamma is not None and info.gamma >= 0.45 and info.gamma <= 0.46
+
+def get_validation_error(info, firstInfo):
+
+    # All textures of a sequence need to be readable and have the resolution of the first texture
+    if(len(info.errorText) > 0):
+        return info.errorText
+    if(len(firstInfo.errorText) > 0):
+        return firstInfo.errorText
+    if(info.width != firstInfo.width or info.height != firstInfo.height):
+        return "All textures need to have the same resolution!"
+    return ""
@@ -0,0 +1,114 @@
+import json
+import time
+from threading import Lock
+
+# Statistics of a conversion. Every converted frame reports the time it spent in each stage, the bytes it read and wrote,
+# its vertex counts and the depths of the queues when it was finished. The passes which run once for the whole sequence
+# report their duration. All records can be written into a JSON lines trace file, with one record per line, e.g.:
+#   {"event": "frame", "type": "model", "index": 3, "file": "frame_3.ply", "stages": {"read": 0.01, "parse": 0.02, "pack": 0.01, "write": 0.01},
+#    "bytesRead": 80199, "bytesWritten": 40111, "vertexCount": 5000, "indiceCount": 0, "queues": {"read": 4, "process": 2, "write": 0}, "time": 1.52}
+#   {"event": "pass", "name": "metadata", "duration": 0.01, "time": 3.1}
+#   {"event": "summary", ...} The totals of get_summary(), written when the trace is closed
+# All times are in seconds, the time of a record is measured from the start of the conversion. The stage times
+# only contain the time the frame was worked on, not the time it waited in the queues between the stages.
+# Textures are encoded in batches, so their encoding time is split evenly over all textures of a batch.
+
+def add_stage_time(stageTimes, stage, startTime):
+    # Adds the time since startTime to the stage and returns the current time, so that consecutive stages can be chained
+    now = time.perf_counter()
+    stageTimes[stage] = stageTimes.get(stage, 0.0) + now - startTime
+    return now
+
+class ConversionStats:
+
+    def __init__(self, traceFile = "", statsCB = None):
+        self.statsCB = statsCB # statsCB(record) is optional and called for every record, from the thread which created it
+        self.lock = Lock()
+        self.startTime = time.perf_counter()
+        self.trace = open(traceFile, 'w') if len(traceFile) > 0 else None
+
+        self.frameCounts = {"model" : 0, "image" : 0}
+        self.cachedCounts = {"model" : 0, "image" : 0}
+        self.stageTimes = {"model" : {}, "image" : {}}
+        self.passTimes = {}
+        self.bytesRead = 0
+        self.bytesWritten = 0
+        self.vertexCount = 0
+        self.maxQueueDepths = {}
+
+    def add_frame(self, frameType, index, file, stageTimes, bytesRead, bytesWritten, cached, vertexCount = None, indiceCount = None, queueDepths = None):
+
+        record = {"event" : "frame", "type" : frameType, "index" : index, "file" : file, "stages" : stageTimes, "bytesRead" : bytesRead, "bytesWritten" : bytesWritten}
+        if(cached):
+            record["cached"] = True
+        if(vertexCount is not None):
+            record["vertexCount"] = vertexCount
+            record["indiceCount"] = indiceCount
+        if(queueDepths is not None):
+            record["queues"] = queueDepths
+
+        self.lock.acquire()
+        self.frameCounts[frameType] += 1
+        if(cached):
+            self.cachedCounts[frameType] += 1
+        for stage, stageTime in stageTimes.items():
+            self.stageTimes[frameType][stage] = self.stageTimes[frameType].get(stage, 0.0) + stageTime
+        self.bytesRead += bytesRead
+        self.bytesWritten += bytesWritten
+        self.vertexCount += vertexCount if vertexCount is not None else 0
+        for queue, depth in (queueDepths or {}).items():
+            self.maxQueueDepths[queue] = max(self.maxQueueDepths.get(queue, 0), depth)
+        self.write_record(record)
+        self.lock.release()
+
+        if(self.statsCB is not None):
+            self.statsCB(record)
+
+    def add_pass(self, name, startTime):
+
+        record = {"event" : "pass", "name" : name, "duration" : time.perf_counter() - startTime}
+
+        self.lock.acquire()
+        self.passTimes[name] = self.passTimes.get(name, 0.0) + record["duration"]
+        self.write_record(record)
+        self.lock.release()
+
+        if(self.statsCB is not None):
+            self.statsCB(record)
+
+    def write_record(self, record):
+        # Needs to be called while holding the lock
+        record["time"] = time.perf_counter() - self.startTime
+        if(self.trace is not None):
+            self.trace.write(json.dumps(record) + "\n")
+
+    def get_summary(self):
+
+        self.lock.acquire()
+        elapsedTime = time.perf_counter() - self.startTime
+        summary = {
+            "event" : "summary",
+            "elapsedTime" : elapsedTime,
+            "frames" : dict(self.frameCounts),
+            "cachedFrames" : dict(self.cachedCounts),
+            "stages" : {frameType : dict(stageTimes) for frameType, stageTimes in self.stageTimes.items()},
+            "passes" : dict(self.passTimes),
+            "bytesRead" : self.bytesRead,
+            "bytesWritten" : self.bytesWritten,
+            "vertexCount" : self.vertexCount,
+            "maxQueueDepths" : dict(self.maxQueueDepths),
+        }
+        self.lock.release()
+        return summary
+
+    def close(self):
+
+        # Writes the summary into the trace. Further records are only passed to the statsCB
+        summary = self.get_summary()
+
+        self.lock.acquire()
+        if(self.trace is not None):
+            self.trace.write(json.dumps(summary) + "\n")
+            self.trace.close()
+            self.trace = None
+        self.lock.release()
@@ -0,0 +1,66 @@
+import os
+from threading import Condition
+import Sequence_Model_Reader
+
+# Limits the memory of the models which are converted at the same time. The working set of each frame is estimated
+# before it is loaded, and the frame is only admitted once the estimates of all frames in flight fit into the budget.
+# The factors are based on the peak memory measured while converting large frames:
+#   .ply files read directly hold the file data, the vertex arrays and the packed body at the same time
+#   Models loaded with pymeshlab additionally hold the meshlab mesh, which stores all attributes in double precision
+
+directReadFactor = 4 # Bytes per byte of the file, for .ply files which are read without pymeshlab
+meshlabVertexSize = 192 # Bytes per vertex, for models loaded with pymeshlab
+meshlabFaceSize = 160 # Bytes per face, for models loaded with pymeshlab
+meshlabFileFactor = 3 # Bytes per byte of the file, for models loaded with pymeshlab without a .ply header (e.g. .obj)
+
+def estimate_model_memory(path, usesMeshlab, requireNormals):
+
+    # Returns the estimated peak memory for converting the model in bytes, or 0 if the file can't be read
+    try:
+        fileSize = os.path.getsize(path)
+    except OSError:
+        return 0
+
+    header = None
+    if(path.lower().endswith(".ply")):
+        try:
+            header = Sequence_Model_Reader.read_ply_header(path)
+        except OSError:
+            header = None
+
+    # .ply files which the reader can't handle directly (e.g. ascii files or faces with uvs) are loaded with pymeshlab as well
+    if(not usesMeshlab and Sequence_Model_Reader.can_read_ply_directly(header, requireNormals)):
+        return fileSize * directReadFactor
+
+    if(header is None or header.get_element("vertex") is None):
+        return fileSize * meshlabFileFactor
+
+    faces = header.get_element("face")
+    faceCount = faces.count if faces is not None else 0
+    return header.get_element("vertex").count * meshlabVertexSize + faceCount * meshlabFaceSize
+
+class MemoryBudget:
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.reserved = 0
+        self.peakReserved = 0
+        self.condition = Condition()
+
+    def reserve(self, size):
+
+        # Blocks until the size fits into the budget and returns the reserved size. A model which is larger than the
+        # whole budget is admitted once nothing else is reserved, so that it can still be converted on its own
+        self.condition.acquire()
+        while(self.reserved > 0 and self.reserved + size > self.budget):
+            self.condition.wait()
+        self.reserved += size
+        self.peakReserved = max(self.peakReserved, self.reserved)
+        self.condition.release()
+        return size
+
+    def release(self, size):
+        self.condition.acquire()
+        self.reserved -= size
+        self.condition.notify_all()
+        self.condition.release()
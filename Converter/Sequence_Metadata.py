@@ -1,7 +1,37 @@
 from enum import IntEnum
 import json
+import numpy as np
 from threading import Lock
 
+# The per-frame arrays can optionally be written into a binary sidecar file instead of the sequence.json:
+#   Header      frameDataHeaderDtype, 16 bytes
+#   Names       arrayCount x 16 byte ascii names, zero padded
+#   Arrays      arrayCount x frameCount little endian uint32 values, one array after the other
+# The value of array i for frame j is therefore always at: 16 + arrayCount * 16 + (i * frameCount + j) * 4
+frameDataFileName = "sequence_frames.bin"
+frameDataMagic = b"GSQF"
+frameDataVersion = 1
+frameDataHeaderDtype = np.dtype([("magic", "S4"), ("version", "<u4"), ("frameCount", "<u4"), ("arrayCount", "<u4")])
+frameDataNameDtype = np.dtype("S16")
+frameDataArrays = ["headerSizes", "verticeCounts", "indiceCounts"] # Followed by "lodVertices<n>" (and "lodIndices<n>"/"lodHeaders<n>" for meshes) for each level of detail
+
+def read_frame_data(path):
+
+    # Reference reader for the binary sidecar. Returns a dict with a mapped uint32 array per name
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    header = data[:frameDataHeaderDtype.itemsize].view(frameDataHeaderDtype)[0]
+    if(header["magic"] != frameDataMagic or header["version"] != frameDataVersion):
+        raise ValueError("Not a frame data file: " + path)
+
+    frameCount = int(header["frameCount"])
+    arrayCount = int(header["arrayCount"])
+    namesOffset = frameDataHeaderDtype.itemsize
+    arraysOffset = namesOffset + arrayCount * frameDataNameDtype.itemsize
+    names = data[namesOffset:arraysOffset].view(frameDataNameDtype)
+    arrays = data[arraysOffset:arraysOffset + arrayCount * frameCount * 4].view("<u4").reshape(arrayCount, frameCount)
+
+    return {name.decode('ascii') : arrays[i] for i, name in enumerate(names)}
+
 class GeometryType(IntEnum):
     point = 0
     mesh = 1
@@ -28,9 +58,29 @@ class MetaData():
     textureHeight = 0
     textureSizeDDS = 0
     textureSizeASTC = 0
+    textureArrayDDS = {} # Only set if the per-frame textures are packed into texture arrays, see Sequence_Texture_Array
+    textureArrayASTC = {}
+    textureLevelWidths = [] # Only set if the textures have multiple resolution levels, which are written into mip<n> subfolders
+    textureLevelHeights = []
+    textureLevelSizesDDS = []
+    textureLevelSizesASTC = []
     headerSizes = []
     verticeCounts = []
     indiceCounts = []
+    containerFile = "" # Only set if the sequence is packed into a container
+    frameDataFile = "" # Only set if the per-frame arrays are written into the binary sidecar
+    positionEncoding = "" # Only set for quantized positions, see Sequence_Quantization
+    positionBits = []
+    positionScale = []
+    positionOffset = []
+    normalEncoding = "" # Only set for octahedral normals, see Sequence_Quantization
+    frameCompression = "" # Only set if the frame bodies are compressed, see Sequence_Compression
+    frameChunkSize = 0
+    keyframeInterval = 0 # Only set for delta encoded sequences, see SequenceConverter.encode_temporal_deltas
+    lodPercentages = [] # Only set for sequences with levels of detail, see Sequence_Ordering.get_lod_order and SequenceConverter.simplify_model
+    lodVerticeCounts = []
+    lodIndiceCounts = [] # Only for meshes, as their levels of detail are written into separate files
+    lodHeaderSizes = []
 
     #Ensure that this class can be called from multiple threads
     metaDataLock = Lock()
@@ -64,11 +114,54 @@ class MetaData():
             "textureHeight" : self.textureHeight,
             "textureSizeDDS" : self.textureSizeDDS,
             "textureSizeASTC" : self.textureSizeASTC,
-            "headerSizes" : self.headerSizes,
-            "verticeCounts" : self.verticeCounts,
-            "indiceCounts" : self.indiceCounts,
         }
 
+        if(len(self.textureArrayDDS) > 0):
+            asDict["textureArrayDDS"] = self.textureArrayDDS
+        if(len(self.textureArrayASTC) > 0):
+            asDict["textureArrayASTC"] = self.textureArrayASTC
+
+        if(len(self.textureLevelWidths) > 1):
+            asDict["textureLevelWidths"] = self.textureLevelWidths
+            asDict["textureLevelHeights"] = self.textureLevelHeights
+            asDict["textureLevelSizesDDS"] = self.textureLevelSizesDDS
+            asDict["textureLevelSizesASTC"] = self.textureLevelSizesASTC
+
+        if(len(self.positionEncoding) > 0):
+            asDict["positionEncoding"] = self.positionEncoding
+            asDict["positionBits"] = self.positionBits
+            asDict["positionScale"] = { "x" : self.positionScale[0], "y" : self.positionScale[1], "z" : self.positionScale[2] }
+            asDict["positionOffset"] = { "x" : self.positionOffset[0], "y" : self.positionOffset[1], "z" : self.positionOffset[2] }
+
+        if(len(self.normalEncoding) > 0):
+            asDict["normalEncoding"] = self.normalEncoding
+
+        if(len(self.frameCompression) > 0):
+            asDict["frameCompression"] = self.frameCompression
+            asDict["frameChunkSize"] = self.frameChunkSize
+
+        if(self.keyframeInterval > 0):
+            asDict["keyframeInterval"] = self.keyframeInterval
+
+        if(len(self.lodPercentages) > 0):
+            asDict["lodPercentages"] = self.lodPercentages
+
+        if(len(self.frameDataFile) > 0):
+            asDict["frameCount"] = len(self.headerSizes)
+            asDict["frameDataFile"] = self.frameDataFile
+        else:
+            asDict["headerSizes"] = self.headerSizes
+            asDict["verticeCounts"] = self.verticeCounts
+            asDict["indiceCounts"] = self.indiceCounts
+            if(len(self.lodPercentages) > 0):
+                asDict["lodVerticeCounts"] = self.lodVerticeCounts
+            if(len(self.lodPercentages) > 0 and self.geometryType != GeometryType.point):
+                asDict["lodIndiceCounts"] = self.lodIndiceCounts
+                asDict["lodHeaderSizes"] = self.lodHeaderSizes
+
+        if(len(self.containerFile) > 0):
+            asDict["containerFile"] = self.containerFile
+
         return asDict
 
     def set_metadata_Model(self, vertexCount, indiceCount, headerSize, geometryType, hasUV, hasNormals, useCompressions, listIndex):
@@ -129,6 +222,45 @@ class MetaData():
         return boundsCenter, boundsSize
 
 
+    def set_metadata_position_encoding(self, encoding, bits, scale, offset):
+
+        self.metaDataLock.acquire()
+
+        self.positionEncoding = encoding
+        self.positionBits = bits
+        self.positionScale = scale
+        self.positionOffset = offset
+
+        self.metaDataLock.release()
+
+    def set_metadata_normal_encoding(self, encoding):
+
+        self.metaDataLock.acquire()
+        self.normalEncoding = encoding
+        self.metaDataLock.release()
+
+    def set_metadata_frame_compression(self, codec, chunkSize):
+
+        self.metaDataLock.acquire()
+        self.frameCompression = codec
+        self.frameChunkSize = chunkSize
+        self.metaDataLock.release()
+
+    def set_metadata_lods(self, lodPercentages, lodVerticeCounts, listIndex, lodIndiceCounts = None, lodHeaderSizes = None):
+
+        self.metaDataLock.acquire()
+        self.lodPercentages = lodPercentages
+        self.lodVerticeCounts[listIndex] = lodVerticeCounts
+        self.lodIndiceCounts[listIndex] = lodIndiceCounts
+        self.lodHeaderSizes[listIndex] = lodHeaderSizes
+        self.metaDataLock.release()
+
+    def set_metadata_keyframes(self, interval):
+
+        self.metaDataLock.acquire()
+        self.keyframeInterval = interval
+        self.metaDataLock.release()
+
     def set_metadata_texture(self, DDS, ASTC, width, height, sizeDDS, sizeASTC, textureMode):
 
         self.metaDataLock.acquire()
@@ -151,6 +283,30 @@ class MetaData():
 
         self.metaDataLock.release()
 
+    def set_metadata_texture_array(self, textureFormat, file, offset, stride, level = 0):
+
+        # The data of frame i starts at offset + i * stride. The arrays of the lower resolution levels are listed under "levels"
+        self.metaDataLock.acquire()
+        textureArray = {"file" : file, "offset" : offset, "stride" : stride}
+        if(level > 0):
+            textureArrays = self.textureArrayDDS if textureFormat == "dds" else self.textureArrayASTC
+            textureArrays.setdefault("levels", []).append(textureArray)
+        elif(textureFormat == "dds"):
+            self.textureArrayDDS = textureArray
+        else:
+            self.textureArrayASTC = textureArray
+        self.metaDataLock.release()
+
+    def set_metadata_texture_levels(self, widths, heights, sizesDDS, sizesASTC):
+
+        # The resolution and texture sizes of each level, starting with the full resolution
+        self.metaDataLock.acquire()
+        self.textureLevelWidths = widths
+        self.textureLevelHeights = heights
+        self.textureLevelSizesDDS = sizesDDS
+        self.textureLevelSizesASTC = sizesASTC
+        self.metaDataLock.release()
+
     def write_metaData(self, outputDir):
 
         self.metaDataLock.acquire()
@@ -160,4 +316,36 @@ class MetaData():
         with open(outputPath, 'w') as f:
             json.dump(content, f)
 
+        if(len(self.frameDataFile) > 0):
+            self.write_frame_data(outputDir + "/" + self.frameDataFile)
+
         self.metaDataLock.release()
+
+    def write_frame_data(self, outputPath):
+
+        frameCount = len(self.headerSizes)
+
+        header = np.zeros(1, dtype=frameDataHeaderDtype)
+        header["magic"] = frameDataMagic
+        header["version"] = frameDataVersion
+        header["frameCount"] = frameCount
+        arrayNames = list(frameDataArrays)
+        arrayValues = [self.headerSizes, self.verticeCounts, self.indiceCounts]
+        if(len(self.lodPercentages) > 0):
+            for lod in range(len(self.lodPercentages) + 1):
+                arrayNames.append("lodVertices" + str(lod))
+                arrayValues.append([counts[lod] for counts in self.lodVerticeCounts])
+            if(self.geometryType != GeometryType.point):
+                for lod in range(len(self.lodPercentages) + 1):
+                    arrayNames += ["lodIndices" + str(lod), "lodHeaders" + str(lod)]
+                    arrayValues += [[counts[lod] for counts in self.lodIndiceCounts], [sizes[lod] for sizes in self.lodHeaderSizes]]
+
+        header["arrayCount"] = len(arrayNames)
+
+        names = np.array([name.encode('ascii') for name in arrayNames], dtype=frameDataNameDtype)
+        arrays = np.array(arrayValues, dtype="<u4").reshape(len(arrayNames), frameCount)
+
+        with open(outputPath, 'wb') as f:
+            f.write(header.view(np.uint8))
+            f.write(names.view(np.uint8))
+            f.write(arrays.view(np.uint8))
@@ -0,0 +1,358 @@
+import os
+import numpy as np
+
+# Lightweight readers for the most common input formats, which work directly on the
+# file data with numpy, instead of building a full pymeshlab MeshSet
+
+plyTypes = {
+    "char" : "i1", "int8" : "i1",
+    "uchar" : "u1", "uint8" : "u1",
+    "short" : "i2", "int16" : "i2",
+    "ushort" : "u2", "uint16" : "u2",
+    "int" : "i4", "int32" : "i4",
+    "uint" : "u4", "uint32" : "u4",
+    "half" : "f2", "float16" : "f2",
+    "float" : "f4", "float32" : "f4",
+    "double" : "f8", "float64" : "f8",
+}
+
+plyFormats = {
+    "binary_little_endian" : "<",
+    "binary_big_endian" : ">",
+    "ascii" : None,
+}
+
+maxHeaderSize = 65536
+
+class PlyProperty:
+    name = ""
+    type = ""
+    listCountType = None # Only set for list properties
+
+class PlyElement:
+    name = ""
+    count = 0
+
+    def __init__(self):
+        self.properties = []
+
+    def has_lists(self):
+        for prop in self.properties:
+            if(prop.listCountType is not None):
+                return True
+        return False
+
+    def get_property(self, name):
+        for prop in self.properties:
+            if(prop.name == name):
+                return prop
+        return None
+
+class PlyHeader:
+    format = ""
+    headerSize = 0
+
+    def __init__(self):
+        self.elements = []
+
+    def get_element(self, name):
+        for element in self.elements:
+            if(element.name == name):
+                return element
+        return None
+
+def read_ply_header(path):
+
+    # Returns None if the file is not a (valid) .ply file
+    with open(path, 'rb') as f:
+        data = f.read(maxHeaderSize)
+
+    return parse_ply_header(data)
+
+def parse_ply_header(data):
+
+    data = data[:maxHeaderSize]
+    end = data.find(b"end_header")
+    if(not data.startswith(b"ply") or end < 0):
+        return None
+
+    # The header ends after the line break following "end_header"
+    lineEnd = data.find(b"\n", end)
+    if(lineEnd < 0):
+        return None
+
+    header = PlyHeader()
+    header.headerSize = lineEnd + 1
+
+    try:
+        lines = data[:end].decode('ascii').splitlines()
+    except UnicodeDecodeError:
+        return None
+
+    for line in lines:
+        words = line.split()
+        if(len(words) < 1):
+            continue
+
+        if(words[0] == "format"):
+            header.format = words[1]
+
+        elif(words[0] == "element"):
+            element = PlyElement()
+            element.name = words[1]
+            element.count = int(words[2])
+            header.elements.append(element)
+
+        elif(words[0] == "property"):
+            if(len(header.elements) < 1):
+                return None
+            prop = PlyProperty()
+            if(len(words) < 3 or (words[1] == "list" and len(words) < 5)):
+                return None
+            if(words[1] == "list"):
+                prop.listCountType = words[2]
+                prop.type = words[3]
+                prop.name = words[4]
+            else:
+                prop.type = words[1]
+                prop.name = words[2]
+
+            if(prop.type not in plyTypes or (prop.listCountType is not None and prop.listCountType not in plyTypes)):
+                return None
+            header.elements[-1].properties.append(prop)
+
+    if(header.format not in plyFormats):
+        return None
+
+    return header
+
+def get_element_dtype(header, element):
+
+    # Only elements without list properties have a fixed size per entry
+    if(element.has_lists()):
+        return None
+
+    byteOrder = plyFormats[header.format]
+    return np.dtype([(prop.name, byteOrder + plyTypes[prop.type]) for prop in element.properties])
+
+def get_element_offset(header, elementName):
+
+    # The byte offset of an element in a binary .ply, or None if it can't be determined without parsing
+    offset = header.headerSize
+    for element in header.elements:
+        if(element.name == elementName):
+            return offset
+        dtype = get_element_dtype(header, element)
+        if(dtype is None):
+            return None
+        offset += dtype.itemsize * element.count
+    return None
+
+def scan_ply_bounds(path):
+
+    header = read_ply_header(path)
+    if(header is None):
+        return None
+
+    vertexElement = header.get_element("vertex")
+    if(vertexElement is None or vertexElement.count < 1):
+        return None
+
+    for axis in ["x", "y", "z"]:
+        if(vertexElement.get_property(axis) is None):
+            return None
+
+    if(header.format == "ascii"):
+        # Vertices are always stored first in ascii files written by common tools
+        if(header.elements[0] is not vertexElement or vertexElement.has_lists()):
+            return None
+        columns = [i for i, prop in enumerate(vertexElement.properties) if prop.name in ["x", "y", "z"]]
+        with open(path, 'rb') as f:
+            f.seek(header.headerSize)
+            positions = np.loadtxt(f, dtype=np.float64, usecols=columns, max_rows=vertexElement.count, ndmin=2)
+
+    else:
+        dtype = get_element_dtype(header, vertexElement)
+        offset = get_element_offset(header, "vertex")
+        if(dtype is None or offset is None):
+            return None
+        if(offset + dtype.itemsize * vertexElement.count > os.path.getsize(path)):
+            return None
+        # Reduce each axis directly on the mapped file, so no copy of the vertices is created
+        vertices = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(vertexElement.count,))
+        boundsMin = np.array([vertices[axis].min() for axis in ["x", "y", "z"]], dtype=np.float64)
+        boundsMax = np.array([vertices[axis].max() for axis in ["x", "y", "z"]], dtype=np.float64)
+        return boundsMin, boundsMax
+
+    return positions.min(axis=0), positions.max(axis=0)
+
+def scan_obj_bounds(path):
+
+    # Only the vertex position lines ("v x y z", separated by spaces or tabs) are parsed, everything else is skipped
+    with open(path, 'rb') as f:
+        vertexLines = (line for line in f if line[:2] in (b"v ", b"v\t"))
+        positions = np.loadtxt(vertexLines, dtype=np.float64, usecols=(1, 2, 3), ndmin=2)
+
+    if(len(positions) < 1):
+        return None
+
+    return positions.min(axis=0), positions.max(axis=0)
+
+def scan_bounds(path):
+
+    # Returns the min and max bounds of a model file, or None if the
+    # format is not supported and the model needs to be fully loaded
+    fileEnding = path.split(".")[-1].lower()
+
+    try:
+        if(fileEnding == "ply"):
+            return scan_ply_bounds(path)
+        if(fileEnding == "obj"):
+            return scan_obj_bounds(path)
+    except (ValueError, OSError):
+        return None
+
+    return None
+
+class ModelData:
+    # The attributes of a loaded frame. Vertices, normals and uvs are float32 arrays,
+    # colors are RGBA uchar arrays and faces are already flipped to match the mirrored x-Axis
+    isPointcloud = True
+    hasUVs = False
+    vertices = None
+    normals = None
+    colors = None
+    uvs = None
+    faces = None
+    boundsMin = None
+    boundsMax = None
+    averageNormal = None # Only set for pointclouds with estimated normals
+
+plyUVNames = [("s", "t"), ("u", "v"), ("texture_u", "texture_v")]
+plyIndexNames = ["vertex_indices", "vertex_index"]
+plyColorNames = ["red", "green", "blue", "alpha"]
+
+# The only vertex properties read_ply_model understands. Files with any other vertex property (e.g. diffuse_red)
+# are loaded with pymeshlab, which might interpret them
+plyVertexNames = ["x", "y", "z", "nx", "ny", "nz"] + plyColorNames + [name for uvNames in plyUVNames for name in uvNames]
+
+def get_vector(records, names, dtype):
+    vector = np.empty((len(records), len(names)), dtype=dtype)
+    for i, name in enumerate(names):
+        vector[:,i] = records[name]
+    return vector
+
+def can_read_ply_directly(header, requireNormals):
+
+    # Checks everything read_ply_model needs from the header: A binary file, which only contains vertices with
+    # positions and plain triangle lists. Files which fail this check are loaded with pymeshlab instead
+    if(header is None or header.format == "ascii"):
+        return False
+
+    vertexElement = header.get_element("vertex")
+    faceElement = header.get_element("face")
+    if(vertexElement is None or vertexElement.count < 1 or header.elements[0] is not vertexElement):
+        return False
+
+    for element in header.elements:
+        if(element is not vertexElement and element is not faceElement and element.count > 0):
+            return False
+
+    if(get_element_dtype(header, vertexElement) is None):
+        return False
+
+    propertyNames = [prop.name for prop in vertexElement.properties]
+    for name in ["x", "y", "z"]:
+        if(name not in propertyNames):
+            return False
+
+    for prop in vertexElement.properties:
+        if(prop.name not in plyVertexNames or prop.listCountType is not None):
+            return False
+
+    if(faceElement is not None and faceElement.count > 0):
+        if(len(faceElement.properties) != 1 or faceElement.properties[0].name not in plyIndexNames):
+            return False
+        if(faceElement.properties[0].listCountType is None):
+            return False
+
+        # Meshlab calculates the normals for meshes without normals
+        if(requireNormals and not all(name in propertyNames for name in ["nx", "ny", "nz"])):
+            return False
+
+    # Pointcloud colors are only supported as bytes
+    else:
+        for name in plyColorNames:
+            if(name in propertyNames and vertexElement.get_property(name).type not in ["uchar", "uint8"]):
+                return False
+
+    return True
+
+def read_ply_model(path, requireNormals, fileData = None):
+
+    # Reads binary .ply files, which only contain vertices and triangles, directly from the mapped file,
+    # or from the already read file content (fileData) if given.
+    # Returns None if the file contains anything else and needs to be loaded with pymeshlab instead
+    if(fileData is None):
+        fileData = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        fileData = np.frombuffer(fileData, dtype=np.uint8)
+
+    header = parse_ply_header(fileData[:maxHeaderSize].tobytes())
+    if not (can_read_ply_directly(header, requireNormals)):
+        return None
+
+    vertexElement = header.get_element("vertex")
+    faceElement = header.get_element("face")
+    vertexDtype = get_element_dtype(header, vertexElement)
+    propertyNames = [prop.name for prop in vertexElement.properties]
+
+    offset = header.headerSize
+    if(offset + vertexDtype.itemsize * vertexElement.count > len(fileData)):
+        return None
+
+    vertexRecords = np.ndarray(shape=(vertexElement.count,), dtype=vertexDtype, buffer=fileData, offset=offset)
+    offset += vertexDtype.itemsize * vertexElement.count
+
+    model = ModelData()
+
+    # Faces are only supported as plain triangle lists
+    if(faceElement is not None and faceElement.count > 0):
+        indexProperty = faceElement.properties[0]
+        byteOrder = plyFormats[header.format]
+        faceDtype = np.dtype([("count", byteOrder + plyTypes[indexProperty.listCountType]), ("indices", byteOrder + plyTypes[indexProperty.type], (3,))])
+        if(offset + faceDtype.itemsize * faceElement.count > len(fileData)):
+            return None
+
+        faceRecords = np.ndarray(shape=(faceElement.count,), dtype=faceDtype, buffer=fileData, offset=offset)
+        if(not np.all(faceRecords["count"] == 3)):
+            return None
+
+        # Swap the first two indices to invert the face orientation, just like meshing_invert_face_orientation does
+        model.faces = faceRecords["indices"][:, [1, 0, 2]].astype(np.int32)
+        model.isPointcloud = False
+
+    model.vertices = get_vector(vertexRecords, ["x", "y", "z"], np.float32)
+    model.boundsMin = np.array([vertexRecords[axis].min() for axis in ["x", "y", "z"]], dtype=np.float64)
+    model.boundsMax = np.array([vertexRecords[axis].max() for axis in ["x", "y", "z"]], dtype=np.float64)
+
+    if("nx" in propertyNames and "ny" in propertyNames and "nz" in propertyNames):
+        model.normals = get_vector(vertexRecords, ["nx", "ny", "nz"], np.float32)
+
+    if(model.isPointcloud):
+        colorNames = plyColorNames
+
+        # Missing channels are white/opaque, like in meshlab
+        model.colors = np.full((vertexElement.count, 4), 255, dtype=np.uint8)
+        for i, name in enumerate(colorNames):
+            if(name in propertyNames):
+                model.colors[:,i] = vertexRecords[name]
+
+    else:
+        for uvNames in plyUVNames:
+            if(uvNames[0] in propertyNames and uvNames[1] in propertyNames):
+                model.uvs = get_vector(vertexRecords, uvNames, np.float32)
+                model.hasUVs = True
+                break
+
+    return model
@@ -0,0 +1,233 @@
+import numpy as np
+
+# Orderings of the vertices and faces of a frame, which improve the locality of the data for the GPU.
+# Everything except the face order of meshes is computed with sorts over whole arrays, so that the orderings stay cheap compared to loading a frame
+
+mortonBits = 21 # Per axis, so that the code of all three axes fits into an uint64
+vertexCacheSize = 16 # Post-transform vertex cache size the face order of meshes is optimized for
+
+def spread_bits(values):
+
+    # Inserts two zero bits between each of the lower 21 bits
+    values = values.astype(np.uint64)
+    values = (values | (values << np.uint64(32))) & np.uint64(0x1f00000000ffff)
+    values = (values | (values << np.uint64(16))) & np.uint64(0x1f0000ff0000ff)
+    values = (values | (values << np.uint64(8))) & np.uint64(0x100f00f00f00f00f)
+    values = (values | (values << np.uint64(4))) & np.uint64(0x10c30c30c30c30c3)
+    values = (values | (values << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return values
+
+def get_morton_codes(positions, boundsMin = None, boundsMax = None):
+
+    # Quantizes the positions inside of the bounds and interleaves the bits of the three axes (Z-order curve).
+    # Sorting by the codes places points close to each other in space close to each other in memory
+    positions = np.asarray(positions, dtype=np.float32)
+    if(boundsMin is None):
+        boundsMin = positions.min(axis=0)
+        boundsMax = positions.max(axis=0)
+
+    boundsMin = np.asarray(boundsMin, dtype=np.float64)
+    boundsSize = np.asarray(boundsMax, dtype=np.float64) - boundsMin
+    boundsSize[boundsSize <= 0] = 1
+
+    # 21 bits still fit into the mantissa of a float32, which halves the memory traffic
+    maxValue = (1 << mortonBits) - 1
+    scale = (maxValue / boundsSize).astype(np.float32)
+    quantized = np.clip((positions - boundsMin.astype(np.float32)) * scale, 0, maxValue).astype(np.uint32)
+
+    return spread_bits(quantized[:,0]) | (spread_bits(quantized[:,1]) << np.uint64(1)) | (spread_bits(quantized[:,2]) << np.uint64(2))
+
+def get_morton_order(positions, boundsMin = None, boundsMax = None):
+    # Returns the indices which sort the positions along the Z-order curve, and the sorted codes
+    codes = get_morton_codes(positions, boundsMin, boundsMax)
+    order = np.argsort(codes)
+    return order, codes[order]
+
+# How pointclouds are decimated
+#   random  a random subset of the points, in a random order (the original decimation)
+#   stride  evenly spaced points of the Morton ordered pointcloud
+#   voxel   one point per voxel of a grid, which is chosen so that there are at least as many occupied voxels as points to keep
+decimationModes = ["random", "stride", "voxel"]
+
+def get_stride_indices(count, targetCount):
+    # targetCount evenly spaced indices in the range [0, count)
+    targetCount = min(count, targetCount)
+    return np.arange(targetCount, dtype=np.int64) * count // max(1, targetCount)
+
+def get_voxel_starts(sortedCodes, level):
+    # All points of a voxel are next to each other in Morton order. The voxel of a point at a level
+    # (with an edge length of 2^level grid cells) are the bits of its code above 3 * level
+    voxelCodes = sortedCodes >> np.uint64(3 * level)
+    return np.flatnonzero(np.concatenate([[True], voxelCodes[1:] != voxelCodes[:-1]]))
+
+def get_voxel_indices(sortedCodes, targetCount):
+
+    # Keeps the first point of each voxel, using the coarsest grid which still has enough occupied voxels.
+    # Coarser grids have less occupied voxels, so the level can be found with a binary search
+    lowLevel = 0
+    highLevel = mortonBits
+    while(lowLevel < highLevel):
+        level = (lowLevel + highLevel + 1) // 2
+        if(len(get_voxel_starts(sortedCodes, level)) >= targetCount):
+            lowLevel = level
+        else:
+            highLevel = level - 1
+
+    # The voxel count only roughly matches the target, so the remaining voxels are thinned out evenly
+    voxelStarts = get_voxel_starts(sortedCodes, lowLevel)
+    return voxelStarts[get_stride_indices(len(voxelStarts), targetCount)]
+
+def get_bit_reversed_order(count):
+
+    # A permutation of range(count), in which every prefix is spread evenly over the whole range (van der Corput sequence)
+    bits = max(1, int(count - 1).bit_length())
+    values = np.arange(1 << bits, dtype=np.int64)
+    reversedValues = np.zeros(1 << bits, dtype=np.int64)
+    for bit in range(bits):
+        reversedValues |= ((values >> bit) & 1) << (bits - 1 - bit)
+    return reversedValues[reversedValues < count]
+
+def get_lod_order(sortedCodes):
+
+    # Returns a permutation of the Morton sorted points, in which every prefix is an evenly distributed subset.
+    # A point is the first point of its voxel on all levels up to the highest bit in which its code differs from the
+    # code of the previous point. The points are written level by level, starting with the first point of the coarsest
+    # voxels, so that reading the first points of a frame gives a uniform subsample
+    count = len(sortedCodes)
+    differingBits = np.zeros(count, dtype=np.uint64)
+    differingBits[1:] = sortedCodes[1:] ^ sortedCodes[:-1]
+
+    pointLevels = np.full(count, -1, dtype=np.int64) # Duplicate points are never the first point of a voxel
+    for level in range(mortonBits + 1):
+        pointLevels[(differingBits >> np.uint64(3 * level)) != 0] = level
+    if(count > 0):
+        pointLevels[0] = mortonBits + 1
+
+    # Inside of a level, the points are interleaved, so that a partially read level is still evenly distributed
+    order = []
+    for level in range(mortonBits + 1, -2, -1):
+        points = np.flatnonzero(pointLevels == level)
+        if(len(points) > 0):
+            order.append(points[get_bit_reversed_order(len(points))])
+
+    return np.concatenate(order) if len(order) > 0 else np.zeros(0, dtype=np.int64)
+
+def get_lod_counts(vertexCount, lodPercentages):
+    # The point count of each level of detail. The first level always contains all points
+    return [vertexCount] + [int(vertexCount * (percentage / 100)) for percentage in lodPercentages]
+
+class MeshOrder:
+    # A new order for the faces and vertices of a mesh
+    topologyHash = None # Set by the converter, frames with the same topology can reuse the order
+    triangleOrder = None # Old face index of each new face
+    vertexOrder = None # Old vertex index of each new vertex
+    vertexRemap = None # New vertex index of each old vertex
+
+def get_vertex_triangles(faces, vertexCount):
+
+    # The triangles which use each vertex, as one flat list. The triangles of vertex v are triangles[starts[v]:starts[v + 1]]
+    indices = faces.ravel()
+    useCounts = np.bincount(indices, minlength=vertexCount)
+    starts = np.zeros(vertexCount + 1, dtype=np.int64)
+    np.cumsum(useCounts, out=starts[1:])
+    triangles = np.argsort(indices, kind='stable') // 3
+    return triangles, starts, useCounts
+
+def get_tipsify_order(faces, scanOrder, cacheSize):
+
+    # Tipsify (Sander et al., "Fast Triangle Reordering for Vertex Locality and Reduced Overdraw", 2007).
+    # The triangles are emitted as fans around one vertex after the other. The next fan vertex is the one of the last
+    # fan which is still in the simulated vertex cache and whose remaining triangles fit into it, preferring the oldest one.
+    # If there is none, the most recently used vertex with remaining triangles is taken, or the next one in the scan order.
+    # The loop visits every triangle and vertex a constant amount of times, so it works on lists, which are faster than numpy
+    # for single elements
+    vertexCount = len(scanOrder)
+    triangles, starts, useCounts = get_vertex_triangles(faces, vertexCount)
+    triangles = triangles.tolist()
+    starts = starts.tolist()
+    liveCounts = useCounts.tolist() # Triangles of each vertex which haven't been emitted yet
+    cacheTimes = [0] * vertexCount
+    emitted = [False] * len(faces)
+    faceList = faces.tolist()
+    scanOrder = scanOrder.tolist()
+
+    triangleOrder = []
+    deadEnds = []
+    time = cacheSize + 1
+    cursor = 0
+    fanVertex = scanOrder[0] if vertexCount > 0 else -1
+
+    while(fanVertex >= 0):
+        candidates = []
+        for triangle in triangles[starts[fanVertex]:starts[fanVertex + 1]]:
+            if(emitted[triangle]):
+                continue
+            emitted[triangle] = True
+            triangleOrder.append(triangle)
+            for vertex in faceList[triangle]:
+                deadEnds.append(vertex)
+                candidates.append(vertex)
+                liveCounts[vertex] -= 1
+                if(time - cacheTimes[vertex] > cacheSize):
+                    cacheTimes[vertex] = time
+                    time += 1
+
+        fanVertex = -1
+        bestAge = 0
+        for vertex in candidates:
+            if(liveCounts[vertex] > 0):
+                age = time - cacheTimes[vertex]
+                if(age + 2 * liveCounts[vertex] <= cacheSize and age > bestAge):
+                    bestAge = age
+                    fanVertex = vertex
+
+        while(fanVertex < 0 and len(deadEnds) > 0):
+            vertex = deadEnds.pop()
+            if(liveCounts[vertex] > 0):
+                fanVertex = vertex
+
+        while(fanVertex < 0 and cursor < vertexCount):
+            if(liveCounts[scanOrder[cursor]] > 0):
+                fanVertex = scanOrder[cursor]
+            cursor += 1
+
+    return np.array(triangleOrder, dtype=np.int64)
+
+def optimize_mesh_order(faces, positions):
+
+    # Optimizes the mesh for the post-transform vertex cache with Tipsify and then for the vertex fetch.
+    # When Tipsify runs into a dead end, it continues with the next vertex in Morton order, so that the
+    # fans stay spatially close. The vertices are then renumbered in the order in which the triangles first use them
+    faces = np.asarray(faces, dtype=np.int64)
+    vertexCount = len(positions)
+
+    scanOrder = np.argsort(get_morton_codes(positions), kind='stable')
+    triangleOrder = get_tipsify_order(faces, scanOrder, vertexCacheSize)
+
+    indices = faces[triangleOrder].ravel()
+    usedVertices, firstUse = np.unique(indices, return_index=True)
+    vertexOrder = usedVertices[np.argsort(firstUse, kind='stable')]
+
+    # Vertices which no face references stay at the end
+    unusedVertices = np.setdiff1d(np.arange(vertexCount), usedVertices, assume_unique=True)
+    vertexOrder = np.concatenate([vertexOrder, unusedVertices])
+
+    vertexRemap = np.empty(vertexCount, dtype=np.int64)
+    vertexRemap[vertexOrder] = np.arange(vertexCount)
+
+    order = MeshOrder()
+    order.triangleOrder = triangleOrder
+    order.vertexOrder = vertexOrder
+    order.vertexRemap = vertexRemap
+    return order
+
+def apply_mesh_order(model, order):
+
+    # Reorders the faces and all vertex attributes of a ModelData in place. The winding of the faces is kept
+    model.faces = order.vertexRemap[np.asarray(model.faces)[order.triangleOrder]].astype(np.int32)
+    model.vertices = model.vertices[order.vertexOrder]
+
+    if(model.normals is not None and len(model.normals) == len(order.vertexOrder)):
+        model.normals = model.normals[order.vertexOrder]
+    if(model.uvs is not None):
+        model.uvs = model.uvs[order.vertexOrder]
@@ -0,0 +1,154 @@
+import time
+from queue import Queue
+from threading import Thread, Lock
+
+# A staged pipeline, in which every stage has its own worker threads. The stages are connected
+# by bounded queues, so that e.g. reading, processing and writing of different files overlap,
+# while only a limited amount of files is held in memory at any time
+
+class PipelineStage:
+
+    name = ""
+    threadCount = 1
+
+    def __init__(self, name, function, threadCount, queueSize):
+        self.name = name
+        self.function = function
+        self.threadCount = threadCount
+        self.queue = Queue(maxsize = queueSize)
+        self.threads = []
+        self.finishedThreads = 0
+        self.counterLock = Lock()
+
+        # Throughput counters
+        self.itemCount = 0
+        self.byteCount = 0
+        self.busyTime = 0.0
+        self.waitTime = 0.0
+
+    def count_bytes(self, byteCount):
+        self.counterLock.acquire()
+        self.byteCount += byteCount
+        self.counterLock.release()
+
+    def get_counters(self, elapsedTime):
+        self.counterLock.acquire()
+        counters = {
+            "threads" : self.threadCount,
+            "items" : self.itemCount,
+            "bytes" : self.byteCount,
+            "busyTime" : self.busyTime,
+            "waitTime" : self.waitTime,
+            "itemsPerSecond" : self.itemCount / elapsedTime if elapsedTime > 0 else 0,
+            "bytesPerSecond" : self.byteCount / elapsedTime if elapsedTime > 0 else 0,
+        }
+        self.counterLock.release()
+        return counters
+
+class Pipeline:
+
+    # Sent through the queues once all items have been put into the pipeline
+    stopSignal = object()
+
+    def __init__(self, queueSize, errorCB = None):
+        self.queueSize = queueSize
+        self.errorCB = errorCB # errorCB(item, exception) is called when a stage raises an exception. The item is dropped
+        self.stages = []
+        self.feeder = None
+        self.startTime = None
+        self.endTime = None
+
+    def add_stage(self, name, function, threadCount = 1):
+        # function(item) returns the item that is passed to the next stage, or None to drop it
+        stage = PipelineStage(name, function, max(1, threadCount), self.queueSize)
+        self.stages.append(stage)
+        return stage
+
+    def get_stage(self, name):
+        for stage in self.stages:
+            if(stage.name == name):
+                return stage
+        return None
+
+    def start(self, items):
+
+        # Non-blocking, the items are put into the pipeline from a separate thread,
+        # as putting them into the bounded queue blocks once it is full
+        self.startTime = time.perf_counter()
+
+        for stageIndex, stage in enumerate(self.stages):
+            for i in range(stage.threadCount):
+                thread = Thread(target=self.run_stage, args=(stageIndex,), daemon=True)
+                stage.threads.append(thread)
+                thread.start()
+
+        self.feeder = Thread(target=self.feed, args=(items,), daemon=True)
+        self.feeder.start()
+
+    def feed(self, items):
+        for item in items:
+            self.stages[0].queue.put(item)
+        self.stages[0].queue.put(self.stopSignal)
+
+    def run_stage(self, stageIndex):
+
+        stage = self.stages[stageIndex]
+        nextStage = self.stages[stageIndex + 1] if stageIndex + 1 < len(self.stages) else None
+
+        while True:
+            waitStart = time.perf_counter()
+            item = stage.queue.get()
+            workStart = time.perf_counter()
+
+            if(item is self.stopSignal):
+                # Let the other threads of this stage also see the signal. The last thread passes it on
+                stage.queue.put(self.stopSignal)
+                stage.counterLock.acquire()
+                stage.finishedThreads += 1
+                lastThread = stage.finishedThreads == stage.threadCount
+                stage.counterLock.release()
+                if(lastThread and nextStage is not None):
+                    nextStage.queue.put(self.stopSignal)
+                return
+
+            try:
+                output = stage.function(item)
+            except Exception as e:
+                output = None
+                if(self.errorCB is not None):
+                    self.errorCB(item, e)
+
+            workEnd = time.perf_counter()
+            stage.counterLock.acquire()
+            stage.itemCount += 1
+            stage.busyTime += workEnd - workStart
+            stage.waitTime += workStart - waitStart
+            stage.counterLock.release()
+
+            if(output is not None and nextStage is not None):
+                nextStage.queue.put(output)
+
+    def join(self):
+
+        if(self.feeder is not None):
+            self.feeder.join()
+        for stage in self.stages:
+            for thread in stage.threads:
+                thread.join()
+
+        if(self.endTime is None):
+            self.endTime = time.perf_counter()
+
+    def get_queue_depths(self):
+        # The amount of items waiting in front of each stage, keyed by the stage name
+        return {stage.name : stage.queue.qsize() for stage in self.stages}
+
+    def get_counters(self):
+
+        # Returns the throughput counters of all stages, keyed by the stage name
+        if(self.startTime is None):
+            return {}
+
+        endTime = self.endTime if self.endTime is not None else time.perf_counter()
+        elapsedTime = endTime - self.startTime
+        return {stage.name : stage.get_counters(elapsedTime) for stage in self.stages}
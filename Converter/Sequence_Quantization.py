@@ -0,0 +1,135 @@
+import numpy as np
+
+# Encodings for the vertex positions of compressed sequences. Positions are always stored relative
+# to the bounds of the whole sequence, which are known after the preprocessing.
+#   half    float16, normalized to the bounds (the original compression format)
+#   unorm   unsigned integers with a configurable bit depth (up to 16 bits), one ushort per axis
+#   snorm   signed integers with a configurable bit depth (up to 16 bits), one short per axis
+#   packed  all three axes as unsigned integers in a single uint, with 10/11/11 bits for x/y/z
+# For the integer encodings, the player restores the positions per axis with: position = value * scale + offset
+
+positionEncodings = ["half", "unorm", "snorm", "packed"]
+packedPositionBits = [10, 11, 11] # x is stored in the lowest bits, z in the highest bits
+
+def get_position_bits(encoding, bits):
+    if(encoding == "packed"):
+        return list(packedPositionBits)
+    return [bits, bits, bits]
+
+def get_position_field(encoding):
+
+    # The field of the position in the vertex record
+    if(encoding == "unorm"):
+        return ("position", "<u2", (3,))
+    if(encoding == "snorm"):
+        return ("position", "<i2", (3,))
+    if(encoding == "packed"):
+        return ("position", "<u4")
+    return ("position", "<f2", (3,))
+
+def get_position_header(encoding):
+
+    # The .ply header lines of the integer encodings
+    if(encoding == "packed"):
+        return "property uint xyz" + "\n"
+
+    propertyType = "ushort" if encoding == "unorm" else "short"
+    return "".join(["property " + propertyType + " " + axis + "\n" for axis in ["x", "y", "z"]])
+
+def get_unorm_max(bits):
+    return np.array([(1 << b) - 1 for b in bits], dtype=np.float64)
+
+def get_snorm_max(bits):
+    return np.array([(1 << (b - 1)) - 1 for b in bits], dtype=np.float64)
+
+def get_position_dequantization(encoding, bits, boundsCenter, boundsSize):
+
+    # Returns the per axis scale and offset, which turn the stored integers back into positions
+    boundsCenter = np.array(boundsCenter, dtype=np.float64)
+    boundsSize = np.array(boundsSize, dtype=np.float64)
+    axisBits = get_position_bits(encoding, bits)
+
+    if(encoding == "snorm"):
+        scale = boundsSize / (2 * get_snorm_max(axisBits))
+        offset = boundsCenter
+    else:
+        scale = boundsSize / get_unorm_max(axisBits)
+        offset = boundsCenter - boundsSize / 2
+
+    return [float(x) for x in scale], [float(x) for x in offset]
+
+def quantize_positions(vertices, encoding, bits, boundsCenter, boundsSize):
+
+    # Maps the positions into the [-0.5, 0.5] range of the bounds and then onto the integer range
+    boundsSize = np.array(boundsSize, dtype=np.float64)
+    boundsSize[boundsSize <= 0] = 1 # Flat sequences only have a single value on this axis
+    normalized = (vertices.astype(np.float64) - boundsCenter) / boundsSize
+    axisBits = get_position_bits(encoding, bits)
+
+    if(encoding == "snorm"):
+        maxValue = get_snorm_max(axisBits)
+        return np.clip(np.rint(normalized * 2 * maxValue), -maxValue, maxValue).astype(np.int16)
+
+    maxValue = get_unorm_max(axisBits)
+    quantized = np.clip(np.rint((normalized + 0.5) * maxValue), 0, maxValue).astype(np.uint32)
+
+    if(encoding == "packed"):
+        return quantized[:,0] | (quantized[:,1] << axisBits[0]) | (quantized[:,2] << (axisBits[0] + axisBits[1]))
+
+    return quantized.astype(np.uint16)
+
+# Encodings for the vertex normals.
+#   float   float32, or float16 for compressed sequences (the original format)
+#   oct8    octahedral encoding, two snorm chars
+#   oct16   octahedral encoding, two snorm shorts
+# The player decodes the octahedral normals with: n = value / 127 (or 32767), z = 1 - |n.x| - |n.y|,
+# if z < 0: n.xy = (1 - |n.yx|) * sign(n.xy), normal = normalize(n.x, n.y, z)
+
+normalEncodings = ["float", "oct8", "oct16"]
+
+def get_octahedral_type(encoding):
+    return "<i2" if encoding == "oct16" else "i1"
+
+def get_octahedral_max(encoding):
+    return 32767 if encoding == "oct16" else 127
+
+def get_normal_header(encoding):
+    propertyType = "short" if encoding == "oct16" else "char"
+    return "property " + propertyType + " nu" + "\n" + "property " + propertyType + " nv" + "\n"
+
+def sign_not_zero(values):
+    return np.where(values >= 0, 1.0, -1.0).astype(np.float32)
+
+def encode_octahedral(normals, encoding):
+
+    # Projects the normals onto an octahedron and unfolds it into the [-1, 1] square
+    normals = normals.astype(np.float32)
+    length = np.abs(normals).sum(axis=1, keepdims=True)
+    length[length == 0] = 1
+    normals = normals / length
+
+    x = normals[:,0]
+    y = normals[:,1]
+    lowerHemisphere = normals[:,2] < 0
+
+    octahedral = np.empty((len(normals), 2), dtype=np.float32)
+    octahedral[:,0] = np.where(lowerHemisphere, (1 - np.abs(y)) * sign_not_zero(x), x)
+    octahedral[:,1] = np.where(lowerHemisphere, (1 - np.abs(x)) * sign_not_zero(y), y)
+
+    maxValue = get_octahedral_max(encoding)
+    return np.rint(np.clip(octahedral, -1, 1) * maxValue).astype(get_octahedral_type(encoding))
+
+def decode_octahedral(octahedral, encoding):
+
+    octahedral = np.clip(octahedral.astype(np.float32) / get_octahedral_max(encoding), -1, 1)
+
+    normals = np.empty((len(octahedral), 3), dtype=np.float32)
+    normals[:,0] = octahedral[:,0]
+    normals[:,1] = octahedral[:,1]
+    normals[:,2] = 1 - np.abs(octahedral[:,0]) - np.abs(octahedral[:,1])
+
+    fold = np.clip(-normals[:,2], 0, None)
+    normals[:,0] -= fold * sign_not_zero(normals[:,0])
+    normals[:,1] -= fold * sign_not_zero(normals[:,1])
+
+    return normals / np.linalg.norm(normals, axis=1, keepdims=True)
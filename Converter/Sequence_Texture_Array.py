@@ -0,0 +1,93 @@
+import os
+import struct
+import shutil
+import Sequence_Texture_Encoder
+
+# Packs the per-frame textures of a sequence into one texture array file per format. The file starts with a single
+# header, followed by the block data of all frames. All frames have the same resolution and format, so the data
+# of frame i always starts at: headerSize + i * stride
+#   .dds    A DDS texture array (DX10 header with the array size set to the frame count)
+#   .astc   An ASTC image with 2D blocks and one slice per frame (the z size is set to the frame count)
+
+textureArrayFileNames = {"dds" : "texture_array.dds", "astc" : "texture_array.astc"}
+
+ddsHeaderSize = 128
+ddsDX10HeaderSize = 148
+ddsFourCCOffset = 84
+ddsDX10ArraySizeOffset = 140
+ddsLegacyFormats = {b"DXT1" : 71, b"DXT3" : 74, b"DXT5" : 77} # The DXGI formats of the legacy FourCCs
+
+astcHeaderSize = 16
+astcMagic = b"\x13\xab\xa1\x5c"
+
+def get_dds_array_header(header, arraySize):
+
+    # Turns the header of a single DDS texture into the header of a texture array with the same format
+    fourCC = header[ddsFourCCOffset:ddsFourCCOffset + 4]
+    arrayHeader = bytearray(header[:ddsHeaderSize])
+
+    if(fourCC == b"DX10"):
+        arrayHeader += header[ddsHeaderSize:ddsDX10HeaderSize]
+    elif(fourCC in ddsLegacyFormats):
+        arrayHeader[ddsFourCCOffset:ddsFourCCOffset + 4] = b"DX10"
+        arrayHeader += struct.pack("<5I", ddsLegacyFormats[fourCC], Sequence_Texture_Encoder.dxgiTexture2D, 0, 1, 0)
+    else:
+        raise ValueError("Unsupported DDS format: " + str(fourCC))
+
+    arrayHeader[ddsDX10ArraySizeOffset:ddsDX10ArraySizeOffset + 4] = struct.pack("<I", arraySize)
+    return bytes(arrayHeader)
+
+def get_astc_array_header(header, arraySize):
+
+    # The block depth needs to be 1, so that each slice is encoded on its own
+    if(header[:4] != astcMagic or header[6] != 1 or header[13:16] != b"\x01\x00\x00"):
+        raise ValueError("Unsupported ASTC file")
+    return header[:13] + arraySize.to_bytes(3, "little")
+
+def get_header_size(header, textureFormat):
+    if(textureFormat == "astc"):
+        return astcHeaderSize
+    return ddsDX10HeaderSize if header[ddsFourCCOffset:ddsFourCCOffset + 4] == b"DX10" else ddsHeaderSize
+
+def write_texture_array(outputfile, inputfiles, textureFormat):
+
+    # Returns the header size and the stride of the written file. Raises a ValueError if the textures don't match
+    with open(inputfiles[0], 'rb') as f:
+        firstHeader = f.read(ddsDX10HeaderSize)
+
+    if(textureFormat == "astc"):
+        arrayHeader = get_astc_array_header(firstHeader, len(inputfiles))
+    else:
+        arrayHeader = get_dds_array_header(firstHeader, len(inputfiles))
+
+    stride = None
+    tempfile = outputfile + ".tmp"
+
+    # An incomplete array is never left behind, neither as the output nor as the temporary file
+    try:
+        with open(tempfile, 'wb') as output:
+            output.write(arrayHeader)
+
+            for inputfile in inputfiles:
+                with open(inputfile, 'rb') as f:
+                    header = f.read(ddsDX10HeaderSize)
+                    headerSize = get_header_size(header, textureFormat)
+                    if(header[:headerSize] != firstHeader[:headerSize]):
+                        raise ValueError("The format or resolution of the texture differs from the first frame: " + inputfile)
+
+                    f.seek(0, 2)
+                    dataSize = f.tell() - headerSize
+                    if(stride is None):
+                        stride = dataSize
+                    elif(dataSize != stride):
+                        raise ValueError("The size of the texture differs from the first frame: " + inputfile)
+
+                    f.seek(headerSize)
+                    shutil.copyfileobj(f, output, 1 << 20)
+    except (OSError, ValueError):
+        if(os.path.exists(tempfile)):
+            os.remove(tempfile)
+        raise
+
+    os.replace(tempfile, outputfile)
+    return len(arrayHeader), stride
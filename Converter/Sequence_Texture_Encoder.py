@@ -0,0 +1,247 @@
+import os
+import shutil
+import struct
+import subprocess
+import numpy as np
+from PIL import Image
+
+# Texture encoder backends. Each encoder converts a whole batch of images per call,
+# so that external encoders only need to be started once per batch instead of once per image.
+# encode() returns an empty string on success, otherwise an error text
+
+def find_executable(resourcePath, names):
+
+    # Prefers the bundled executables, but also accepts encoders installed on the system
+    for name in names:
+        candidates = [os.path.join(resourcePath, name)]
+        if(os.name == "nt"):
+            candidates.insert(0, os.path.join(resourcePath, name + ".exe"))
+
+        for candidate in candidates:
+            if(os.path.isfile(candidate) and os.access(candidate, os.X_OK)):
+                return candidate
+
+        path = shutil.which(name)
+        if(path is not None):
+            return path
+
+    return None
+
+def run_encoder(args):
+    try:
+        return subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+    except OSError:
+        return False
+
+class TextureEncoder:
+
+    name = ""
+
+    def __init__(self, resourcePath):
+        self.resourcePath = resourcePath
+
+    def is_available(self):
+        return True
+
+    def encode(self, inputfiles, outputfiles, srgb):
+        raise NotImplementedError
+
+class TexconvEncoder(TextureEncoder):
+
+    name = "texconv"
+    executableNames = ["texconv"]
+
+    def is_available(self):
+        return find_executable(self.resourcePath, self.executableNames) is not None
+
+    def encode(self, inputfiles, outputfiles, srgb):
+
+        # texconv accepts multiple input files and names the outputs after the inputs
+        args = [find_executable(self.resourcePath, self.executableNames), "-o", os.path.dirname(outputfiles[0]), "-m", "1", "-f", "DXT1", "-y", "-nologo"]
+        if(srgb):
+            args.append("-srgbo")
+        args += inputfiles
+
+        if not run_encoder(args):
+            return "Error converting DDS textures: " + ", ".join(inputfiles)
+        return ""
+
+class AstcencEncoder(TextureEncoder):
+
+    name = "astcenc"
+    executableNames = ["astcenc", "astcenc-avx2", "astcenc-sse4.1", "astcenc-sse2", "astcenc-neon"]
+
+    def is_available(self):
+        return find_executable(self.resourcePath, self.executableNames) is not None
+
+    def encode(self, inputfiles, outputfiles, srgb):
+
+        # astcenc only takes a single image per invocation, but already uses all cores for it
+        executable = find_executable(self.resourcePath, self.executableNames)
+        for inputfile, outputfile in zip(inputfiles, outputfiles):
+            if not run_encoder([executable, "-cl", inputfile, outputfile, "6x6", "-medium", "-silent"]):
+                return "Error converting ASTC texture: " + inputfile
+        return ""
+
+ddsMagic = b"DDS "
+ddsHeaderFlags = 0x1 | 0x2 | 0x4 | 0x1000 | 0x80000 # Caps, height, width, pixelformat, linearsize
+ddsPixelFormatFourCC = 0x4
+ddsCapsTexture = 0x1000
+dxgiFormatBC1SRGB = 72
+dxgiTexture2D = 3
+
+bc1BlockDtype = np.dtype([("color0", "<u2"), ("color1", "<u2"), ("indices", "<u4")])
+
+def get_dds_header(width, height, linearSize, srgb):
+
+    # Plain DXT1 textures use the legacy header, SRGB textures need the DX10 extension, just like texconv writes them
+    fourCC = b"DX10" if srgb else b"DXT1"
+    pixelFormat = struct.pack("<II4s5I", 32, ddsPixelFormatFourCC, fourCC, 0, 0, 0, 0, 0)
+    header = struct.pack("<7I44x", 124, ddsHeaderFlags, height, width, linearSize, 0, 1) + pixelFormat + struct.pack("<5I", ddsCapsTexture, 0, 0, 0, 0)
+
+    if(srgb):
+        header += struct.pack("<5I", dxgiFormatBC1SRGB, dxgiTexture2D, 0, 1, 0)
+
+    return ddsMagic + header
+
+def to_rgb565(colors):
+    colors = np.clip(np.rint(colors), 0, 255).astype(np.uint16)
+    return ((colors[..., 0] * 31 + 127) // 255 << 11) | ((colors[..., 1] * 63 + 127) // 255 << 5) | ((colors[..., 2] * 31 + 127) // 255)
+
+def from_rgb565(colors):
+    r = (colors >> 11) & 31
+    g = (colors >> 5) & 63
+    b = colors & 31
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=-1).astype(np.float32)
+
+bc1ChunkSize = 1 << 16 # Blocks encoded at once, which keeps the temporary arrays at a few MB, independent of the image size
+
+def encode_bc1(pixels):
+
+    # Encodes an RGB uint8 image into BC1 blocks. The blocks are encoded in chunks of vectorized operations
+    height, width = pixels.shape[0], pixels.shape[1]
+    blocksY = (height + 3) // 4
+    blocksX = (width + 3) // 4
+
+    # Edge pixels are repeated for images that are not a multiple of the block size
+    pixels = np.pad(pixels, ((0, blocksY * 4 - height), (0, blocksX * 4 - width), (0, 0)), mode="edge")
+    blocks = pixels.reshape(blocksY, 4, blocksX, 4, 3).transpose(0, 2, 1, 3, 4).reshape(-1, 16, 3)
+
+    encoded = np.empty(len(blocks), dtype=bc1BlockDtype)
+    for start in range(0, len(blocks), bc1ChunkSize):
+        encoded[start:start + bc1ChunkSize] = encode_bc1_blocks(blocks[start:start + bc1ChunkSize].astype(np.float32))
+    return encoded
+
+def encode_bc1_blocks(blocks):
+
+    # The endpoints are placed along the principal axis of each block's colors, and every pixel picks the closest palette color
+    mean = blocks.mean(axis=1, keepdims=True)
+    centered = blocks - mean
+    covariance = np.einsum("nki,nkj->nij", centered, centered)
+
+    axis = np.ones((len(blocks), 3), dtype=np.float32)
+    for i in range(4):
+        axis = np.einsum("nij,nj->ni", covariance, axis)
+        length = np.linalg.norm(axis, axis=1, keepdims=True)
+        axis = np.divide(axis, length, out=np.zeros_like(axis), where=length > 0)
+
+    projection = np.einsum("nki,ni->nk", centered, axis)
+    endpointMax = mean[:, 0] + axis * projection.max(axis=1, keepdims=True)
+    endpointMin = mean[:, 0] + axis * projection.min(axis=1, keepdims=True)
+
+    color0 = to_rgb565(endpointMax)
+    color1 = to_rgb565(endpointMin)
+
+    # color0 needs to be larger than color1, otherwise the block is decoded in the 3 color mode
+    swap = color0 < color1
+    color0, color1 = np.where(swap, color1, color0), np.where(swap, color0, color1)
+
+    palette0 = from_rgb565(color0)
+    palette1 = from_rgb565(color1)
+    palette = np.stack([palette0, palette1, (2 * palette0 + palette1) / 3, (palette0 + 2 * palette1) / 3], axis=1)
+
+    # A running minimum over the four palette colors, so that only one distance per pixel is kept at a time
+    indices = np.zeros(blocks.shape[:2], dtype=np.uint32)
+    minDistances = np.full(blocks.shape[:2], np.inf, dtype=np.float32)
+    for i in range(4):
+        distances = ((blocks - palette[:, None, i, :]) ** 2).sum(axis=2)
+        closer = distances < minDistances
+        indices[closer] = i
+        minDistances = np.minimum(minDistances, distances)
+    indices[color0 == color1] = 0
+
+    encoded = np.empty(len(blocks), dtype=bc1BlockDtype)
+    encoded["color0"] = color0
+    encoded["color1"] = color1
+    encoded["indices"] = (indices << (2 * np.arange(16, dtype=np.uint32))).sum(axis=1, dtype=np.uint32)
+    return encoded
+
+class BuiltinDDSEncoder(TextureEncoder):
+
+    # Encodes the textures without any external tools, so that the conversion also works on systems
+    # where the bundled encoders can't run. Lower quality than texconv, but fully compatible
+    name = "builtin"
+
+    def encode(self, inputfiles, outputfiles, srgb):
+
+        for inputfile, outputfile in zip(inputfiles, outputfiles):
+            try:
+                with Image.open(inputfile) as pilimg:
+                    pixels = np.asarray(pilimg.convert("RGB"))
+            except OSError:
+                return "Error converting DDS texture: " + inputfile
+
+            encoded = encode_bc1(pixels)
+
+            with open(outputfile, 'wb') as f:
+                f.write(get_dds_header(pixels.shape[1], pixels.shape[0], encoded.nbytes, srgb))
+                f.write(encoded.view(np.uint8))
+
+        return ""
+
+def get_level_dimensions(width, height, level):
+    # Every level halves the resolution of the previous one, but keeps at least one pixel
+    return [max(1, width >> level), max(1, height >> level)]
+
+def write_scaled_images(inputfile, outputfiles):
+
+    # Writes the levels 1, 2, ... of the image as .png files. Each level is downscaled from the previous one
+    # with a box filter, so that the source image is only decoded once. The alpha channel is kept, just like in the first level
+    try:
+        with Image.open(inputfile) as pilimg:
+            hasAlpha = "A" in pilimg.getbands() or "transparency" in pilimg.info
+            scaledimg = pilimg.convert("RGBA" if hasAlpha else "RGB")
+    except OSError:
+        return "Error reading texture: " + inputfile
+
+    for level, outputfile in enumerate(outputfiles, 1):
+        width, height = get_level_dimensions(pilimg.width, pilimg.height, level)
+        scaledimg = scaledimg.resize((width, height), Image.BOX)
+        try:
+            scaledimg.save(outputfile, compress_level=1)
+        except OSError:
+            return "Error writing scaled texture: " + outputfile
+
+    return ""
+
+# Encoders in the order in which they are preferred when set to "auto"
+ddsEncoders = {"texconv" : TexconvEncoder, "builtin" : BuiltinDDSEncoder}
+astcEncoders = {"astcenc" : AstcencEncoder}
+
+def create_encoder(encoders, name, resourcePath):
+
+    # Returns the requested encoder, or None if it is not available on this system
+    if(name == "auto"):
+        for encoderType in encoders.values():
+            encoder = encoderType(resourcePath)
+            if(encoder.is_available()):
+                return encoder
+        return None
+
+    if(name not in encoders):
+        return None
+
+    encoder = encoders[name](resourcePath)
+    if not encoder.is_available():
+        return None
+    return encoder
@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import Sequence_Model_Reader
+import Sequence_Converter_CLI
+
+def write_pointcloud_ply(path, colorNames):
+
+    # A binary pointcloud with a distinct color per point
+    pointCount = 16
+    vertexDtype = np.dtype([("position", "<f4", (3,))] + [(name, "u1") for name in colorNames])
+    vertices = np.zeros(pointCount, dtype=vertexDtype)
+    vertices["position"] = np.random.default_rng(0).random((pointCount, 3))
+    for i, name in enumerate(colorNames):
+        vertices[name] = np.arange(pointCount) * 8 + i
+
+    header = "ply\nformat binary_little_endian 1.0\nelement vertex " + str(pointCount) + "\n"
+    header += "property float x\nproperty float y\nproperty float z\n"
+    header += "".join("property uchar " + name + "\n" for name in colorNames)
+    header += "end_header\n"
+
+    with open(path, 'wb') as f:
+        f.write(header.encode("ascii"))
+        f.write(vertices.tobytes())
+
+    return np.stack([vertices[name] for name in colorNames], axis=1)
+
+def read_converted_colors(path):
+
+    # The colors of an uncompressed converted pointcloud, which stores the positions as floats and RGBA colors
+    with open(path, 'rb') as f:
+        content = f.read()
+    header = Sequence_Model_Reader.parse_ply_header(content)
+    vertexDtype = np.dtype([("position", "<f4", (3,)), ("color", "u1", (4,))])
+    return np.frombuffer(content, dtype=vertexDtype, offset=header.headerSize)["color"]
+
+class DirectPlyReadTest(unittest.TestCase):
+
+    def test_unknown_color_properties_are_loaded_with_meshlab(self):
+
+        # diffuse_* colors are only understood by pymeshlab. The reader must not read them as white
+        with tempfile.TemporaryDirectory() as folder:
+            inputPath = os.path.join(folder, "input")
+            os.makedirs(inputPath)
+            colors = write_pointcloud_ply(os.path.join(inputPath, "frame_0.ply"), ["diffuse_red", "diffuse_green", "diffuse_blue"])
+
+            header = Sequence_Model_Reader.read_ply_header(os.path.join(inputPath, "frame_0.ply"))
+            self.assertFalse(Sequence_Model_Reader.can_read_ply_directly(header, False))
+            self.assertIsNone(Sequence_Model_Reader.read_ply_model(os.path.join(inputPath, "frame_0.ply"), False))
+
+            convertSettings, errorText = Sequence_Converter_CLI.create_conversion_settings(inputPath, os.path.join(folder, "output"))
+            self.assertEqual(errorText, "")
+            convertSettings.maxThreads = 1
+            success, errorText = Sequence_Converter_CLI.convert_sequence(convertSettings)
+            self.assertTrue(success, errorText)
+
+            # Meshlab and the converter reorder the points, so the color sets are compared
+            convertedColors = read_converted_colors(os.path.join(folder, "output", "frame_0.ply"))
+            self.assertEqual(sorted(map(tuple, convertedColors[:, :3].tolist())), sorted(map(tuple, colors.tolist())))
+
+    def test_known_color_properties_are_read_directly(self):
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "frame_0.ply")
+            colors = write_pointcloud_ply(path, ["red", "green", "blue", "alpha"])
+
+            model = Sequence_Model_Reader.read_ply_model(path, False)
+            self.assertIsNotNone(model)
+            np.testing.assert_array_equal(model.colors, colors)
+
+class ObjBoundsTest(unittest.TestCase):
+
+    def test_tab_separated_vertices_are_scanned(self):
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "frame_0.obj")
+            with open(path, 'wb') as f:
+                f.write(b"v\t1 2 3\nv -1\t0 5\nvt 0.5 0.5\nvn 9 9 9\nf 1 2 2\n")
+
+            boundsMin, boundsMax = Sequence_Model_Reader.scan_obj_bounds(path)
+            np.testing.assert_array_equal(boundsMin, [-1, 0, 3])
+            np.testing.assert_array_equal(boundsMax, [1, 2, 5])
+
+if (__name__ == '__main__'):
+    unittest.main()